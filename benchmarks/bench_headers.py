@@ -0,0 +1,54 @@
+# Compares full AF/BK parsing against the metadata-only mode used by
+# cli/anim_strings.py. Run with: python -m benchmarks.bench_headers
+import os
+import tempfile
+
+from omftools.cli.anim_strings import process_af, process_bk
+from omftools.pyshadowdive.af import AFFile
+from omftools.pyshadowdive.bk import BKFile
+
+from .synthetic import make_af, make_bk, timed
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        af_files = [os.path.join(tmp, f"FIGHTR{m}.AF") for m in range(11)]
+        bk_files = [os.path.join(tmp, f"ARENA{m}.BK") for m in range(5)]
+        for seed, filename in enumerate(af_files):
+            make_af(seed=seed).save_native(filename)
+        for seed, filename in enumerate(bk_files):
+            make_bk(seed=seed).save_native(filename)
+
+        def load_full() -> None:
+            for af_file in af_files:
+                AFFile.load_native(af_file)
+            for bk_file in bk_files:
+                BKFile.load_native(bk_file)
+
+        def load_metadata() -> None:
+            for af_file in af_files:
+                AFFile.load_native(af_file, sprites=False)
+            for bk_file in bk_files:
+                BKFile.load_native(
+                    bk_file, sprites=False, background=False, palettes=False
+                )
+
+        def anim_strings() -> None:
+            for af_file in af_files:
+                process_af(af_file)
+            for bk_file in bk_files:
+                process_bk(bk_file)
+
+        full = timed(load_full)
+        metadata = timed(load_metadata)
+        strings = timed(anim_strings)
+        print(
+            f"{len(af_files)} AF + {len(bk_files)} BK files: "
+            f"full parse {full * 1000:.1f} ms, metadata only {metadata * 1000:.1f} ms, "
+            f"speedup {full / metadata:.2f}x"
+        )
+        print(f"anim_strings processing: {strings * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# Compares the default JSON output (byte arrays as lists of ints) against the
+# compact profile (base64 byte arrays), as written by the decompile CLIs, for
+# every installed JSON backend, and against the packed (CBOR) format.
+# Run with: python -m benchmarks.bench_json
+from omftools.pyshadowdive.af import AFFile
+from omftools.pyshadowdive.bk import BKFile
+from omftools.pyshadowdive.utils.json_backends import available_backends
+
+from .synthetic import make_af, make_bk, timed
+
+
+def main() -> None:
+    for name, obj, cls in (("AF", make_af(), AFFile), ("BK", make_bk(), BKFile)):
+        for backend in available_backends():
+            for compact in (False, True):
+
+                def dump() -> str:
+                    return obj.to_json(compact=compact, backend=backend, indent=4)
+
+                data = dump()
+                dump_time = timed(dump, repeat=1)
+                load_time = timed(
+                    lambda: cls.from_json(data, backend=backend), repeat=1
+                )
+                label = "compact" if compact else "default"
+                print(
+                    f"{name} {backend} {label}: {len(data) / 1e6:.1f} MB, "
+                    f"dump {dump_time * 1000:.0f} ms, load {load_time * 1000:.0f} ms"
+                )
+
+        packed = obj.to_packed()
+        dump_time = timed(obj.to_packed, repeat=1)
+        load_time = timed(lambda: cls.from_packed(packed), repeat=1)
+        print(
+            f"{name} cbor: {len(packed) / 1e6:.1f} MB, "
+            f"dump {dump_time * 1000:.0f} ms, load {load_time * 1000:.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Compares AF/BK load times through the different parsers. Run with:
+# python -m benchmarks.bench_parser
+#
+# "per-byte" is the stream parser reading byte arrays one byte at a time, as
+# the original parser did. Once byte arrays are read in bulk (which the
+# stream parser also does now), the remaining cost is a few thousand header
+# fields per file, so "stream" and "buffer" end up within noise of each
+# other; most of the gain over "per-byte" comes from the bulk reads. "mmap"
+# (Entrypoint.load_mmap) also leaves the image data in the mapped file until
+# it is used.
+import os
+import tempfile
+
+from omftools.pyshadowdive.af import AFFile
+from omftools.pyshadowdive.bk import BKFile
+from omftools.pyshadowdive.protos import Entrypoint
+from omftools.pyshadowdive.utils.parser import BinaryParser
+
+from .synthetic import make_af, make_bk, timed
+
+
+class PerByteParser(BinaryParser):
+    __slots__ = ()
+
+    def get_uint8_array(self, length: int) -> bytes:
+        return bytes(self.get_uint8() for _ in range(length))
+
+
+def load_stream(cls: type[Entrypoint], filename: str, parser: type) -> None:
+    with open(filename, "rb", buffering=8192) as handle:
+        cls().read(parser(handle))
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        files = [
+            (AFFile, os.path.join(tmp, "FIGHTR0.AF"), make_af()),
+            (BKFile, os.path.join(tmp, "ARENA0.BK"), make_bk()),
+        ]
+        for cls, filename, obj in files:
+            obj.save_native(filename)
+            size = os.path.getsize(filename)
+            per_byte = timed(lambda: load_stream(cls, filename, PerByteParser), 1)
+            results = [
+                ("stream", timed(lambda: load_stream(cls, filename, BinaryParser))),
+                ("buffer", timed(lambda: cls.load_native(filename))),
+                ("mmap", timed(lambda: cls.load_mmap(filename))),
+            ]
+            print(
+                f"{os.path.basename(filename)} ({size} bytes): "
+                f"per-byte {per_byte * 1000:.1f} ms, "
+                + ", ".join(
+                    f"{name} {t * 1000:.1f} ms ({per_byte / t:.0f}x)"
+                    for name, t in results
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
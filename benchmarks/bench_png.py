@@ -0,0 +1,51 @@
+# Compares the original list based sprite PNG export against rendering the RLE
+# data straight into a PIL buffer. Run with: python -m benchmarks.bench_png
+import io
+
+from PIL import Image
+
+from omftools.pyshadowdive.palette import Palette
+from omftools.pyshadowdive.sprite import Sprite
+
+from .synthetic import make_af, timed
+
+
+def reference_png(sprite: Sprite, palette: Palette) -> bytes:
+    n_pal: list[int] = []
+    for triplet in palette.data:
+        n_pal.extend(triplet)
+    img = Image.new("P", (sprite.width, sprite.height), color=0)
+    img.putdata(sprite.decode_image())
+    img.putpalette(n_pal)
+    out = io.BytesIO()
+    img.save(out, "png", transparency=Sprite.TRANSPARENCY_INDEX)
+    return out.getvalue()
+
+
+def render_png(sprite: Sprite, palette: Palette) -> bytes:
+    img = sprite.render(palette)
+    out = io.BytesIO()
+    img.save(out, "png", transparency=img.info.get("transparency"))
+    return out.getvalue()
+
+
+def main() -> None:
+    af = make_af()
+    sprites = [sprite for move in af.moves.values() for sprite in move.sprites]
+    palette = Palette()
+    palette.data = [(m, m, m) for m in range(256)]
+
+    def render_only() -> None:
+        for sprite in sprites:
+            sprite.render(palette)
+
+    reference = timed(lambda: [reference_png(s, palette) for s in sprites])
+    direct = timed(lambda: [render_png(s, palette) for s in sprites])
+    print(f"{len(sprites)} sprites")
+    print(f"reference export: {reference * 1000:.1f} ms")
+    print(f"direct export: {direct * 1000:.1f} ms ({reference / direct:.1f}x)")
+    print(f"direct render without PNG encoding: {timed(render_only) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
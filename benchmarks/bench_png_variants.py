@@ -0,0 +1,41 @@
+# Compares exporting every sprite under all 19 remaps of a palette mapping
+# with one PIL encode per variant against compressing the pixels once and
+# swapping the PLTE chunk. Run with: python -m benchmarks.bench_png_variants
+import io
+
+from omftools.pyshadowdive.utils import rle
+from omftools.pyshadowdive.utils.png import IndexedPNG
+
+from .synthetic import make_bk, timed
+
+
+def main() -> None:
+    bk = make_bk()
+    sprites = [s for anim in bk.animations.values() for s in anim.sprites]
+    mapping = bk.palettes[0]
+    palettes = [mapping.remap(m) for m in range(len(mapping.remaps))]
+
+    def with_pil() -> None:
+        for sprite in sprites:
+            for palette in palettes:
+                img = sprite.render(palette)
+                img.save(io.BytesIO(), "png", transparency=img.info["transparency"])
+
+    def with_chunks() -> None:
+        for sprite in sprites:
+            data, transparent = rle.decode_indexed(
+                sprite.image, sprite.width, sprite.height
+            )
+            png = IndexedPNG(data, sprite.width, sprite.height, transparent)
+            for palette in palettes:
+                png.with_palette(palette)
+
+    pil = timed(with_pil, repeat=1)
+    chunks = timed(with_chunks, repeat=1)
+    print(f"{len(sprites)} sprites x {len(palettes)} palettes")
+    print(f"PIL encode per variant: {pil * 1000:.1f} ms")
+    print(f"PLTE swap: {chunks * 1000:.1f} ms ({pil / chunks:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Compares the original pixel-at-a-time sprite decoder against the span based
+# decoders, and times re-encoding the decoded sprites. Run with: python -m benchmarks.bench_rle
+from omftools.pyshadowdive.sprite import Sprite
+from omftools.pyshadowdive.utils import rle
+
+from .synthetic import make_af, timed
+
+
+def reference_decode(sprite: Sprite) -> list[int]:
+    image = sprite.image
+    in_size = len(image)
+    out = [Sprite.TRANSPARENCY_INDEX for _ in range(sprite.width * sprite.height)]
+    x = y = i = 0
+    while i < in_size:
+        c = image[i] + (image[i + 1] << 8)
+        data, op = divmod(c, 4)
+        i += 2
+        if op == 0:
+            x = data
+        elif op == 2:
+            y = data
+        elif op == 1:
+            while data > 0:
+                out[(y * sprite.width) + x] = image[i]
+                i += 1
+                x += 1
+                data -= 1
+            x = 0
+    return out
+
+
+def main() -> None:
+    af = make_af()
+    sprites = [sprite for move in af.moves.values() for sprite in move.sprites]
+    for sprite in sprites:
+        assert sprite.decode_image() == reference_decode(sprite)
+
+    reference = timed(lambda: [reference_decode(s) for s in sprites])
+    spans = timed(lambda: [s.decode_image() for s in sprites])
+    print(f"{len(sprites)} sprites")
+    print(f"reference decoder: {reference * 1000:.1f} ms")
+    print(f"span decoder: {spans * 1000:.1f} ms ({reference / spans:.1f}x)")
+    if rle.numpy is not None:
+        arrays = timed(lambda: [s.decode_array() for s in sprites])
+        print(f"numpy decoder: {arrays * 1000:.1f} ms ({reference / arrays:.1f}x)")
+    else:
+        print("numpy decoder: skipped, NumPy is not installed")
+
+    raws = [(s.decode_image(), s.width, s.height) for s in sprites]
+    encode = timed(lambda: [Sprite().encode_image(*raw) for raw in raws])
+    print(f"encoder: {encode * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
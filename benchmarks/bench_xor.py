@@ -0,0 +1,60 @@
+# Compares the old byte-at-a-time XOR loop against the keystream based cipher
+# on an ENGLISH.DAT sized language file. Run with: python -m benchmarks.bench_xor
+import os
+import random
+import tempfile
+
+from omftools.pyshadowdive.language import LanguageFile
+from omftools.pyshadowdive.utils.parser import BinaryParser, xor_stream
+
+from .synthetic import timed
+
+
+def reference_xor(data: bytes, key: int) -> bytes:
+    out = bytearray(data)
+    for m in range(len(out)):
+        out[m] ^= key
+        key = (key + 1) & 0xFF
+    return bytes(out)
+
+
+def make_language(filename: str, count: int = 1000, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    blocks = [
+        bytes(rng.randrange(32, 127) for _ in range(rng.randrange(20, 150))) + b"\0"
+        for _ in range(count)
+    ]
+    offset = count * 36 + 4
+    with open(filename, "wb") as handle:
+        parser = BinaryParser(handle)
+        for m, block in enumerate(blocks):
+            parser.put_uint32(offset)
+            parser.put_null_padded_str(f"Title {m}", 32)
+            offset += len(block)
+        parser.put_uint32(offset)
+        for block in blocks:
+            parser.set_xor_key(len(block) & 0xFF)
+            parser.write(block)
+            parser.set_xor_key(None)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "ENGLISH.DAT")
+        make_language(filename)
+        with open(filename, "rb") as handle:
+            data = handle.read()
+
+        loop = timed(lambda: reference_xor(data, 0))
+        stream = timed(lambda: xor_stream(data, 0))
+        print(
+            f"xor {len(data)} bytes: loop {loop * 1000:.2f} ms, "
+            f"keystream {stream * 1000:.2f} ms, speedup {loop / stream:.1f}x"
+        )
+
+        load = timed(lambda: LanguageFile.load_native(filename))
+        print(f"LanguageFile.load_native: {load * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# Generators for synthetic AF/BK files. The real game data can't be shipped
+# with the repository, so benchmarks build files of roughly the same shape.
+import random
+import typing
+
+from omftools.pyshadowdive.af import AFFile
+from omftools.pyshadowdive.afmove import AFMove, MoveCategory, ExtraStringSelector
+from omftools.pyshadowdive.bk import BKFile
+from omftools.pyshadowdive.bkanim import BKAnimation
+from omftools.pyshadowdive.palette_mapping import PaletteMapping
+from omftools.pyshadowdive.sprite import Sprite
+from omftools.pyshadowdive.utils.types import EncodedImage
+
+# 8-bit color levels that survive the 8-bit -> 6-bit -> 8-bit palette round trip
+VGA_LEVELS = [
+    c8
+    for c8 in (int((c6 * 255.0) / 63.0) for c6 in range(64))
+    if int((int((c8 * 63.0) / 255.0) * 255.0) / 63.0) == c8
+]
+
+
+def encode_rows(rows: list[list[tuple[int, bytes]]]) -> EncodedImage:
+    out: list[int] = []
+
+    def op(data: int, code: int) -> None:
+        c = data * 4 + code
+        out.extend((c & 0xFF, c >> 8))
+
+    for y, runs in enumerate(rows):
+        if not runs:
+            continue
+        op(y, 2)
+        for x, pixels in runs:
+            op(x, 0)
+            op(len(pixels), 1)
+            out.extend(pixels)
+    op(0, 3)
+    return out
+
+
+def make_sprite(rng: random.Random, index: int, width: int, height: int) -> Sprite:
+    rows = []
+    for _ in range(height):
+        start = rng.randrange(0, width // 2)
+        length = rng.randrange(1, width - start + 1)
+        rows.append([(start, bytes(rng.randrange(0, 48) for _ in range(length)))])
+
+    sprite = Sprite()
+    sprite.pos_x = rng.randrange(-100, 100)
+    sprite.pos_y = rng.randrange(-100, 100)
+    sprite.width = width
+    sprite.height = height
+    sprite.index = index
+    sprite.image = encode_rows(rows)
+    return sprite
+
+
+def fill_animation(
+    rng: random.Random, anim: AFMove | BKAnimation, sprites: int, first_index: int
+) -> None:
+    anim.start_x = rng.randrange(-100, 100)
+    anim.start_y = rng.randrange(-100, 100)
+    anim.base_string = "-".join(
+        f"{chr(65 + i)}{rng.randrange(1, 20)}" for i in range(sprites)
+    )
+    anim.extra_strings = [anim.base_string for _ in range(rng.randrange(0, 3))]
+    anim.hit_coords = [
+        {
+            "x": rng.randrange(-50, 50),
+            "null": 0,
+            "y": rng.randrange(-50, 50),
+            "frame_id": 0,
+        }
+        for _ in range(rng.randrange(0, 8))
+    ]
+    anim.sprites = [
+        make_sprite(
+            rng, (first_index + m) % 256, rng.randrange(40, 120), rng.randrange(40, 120)
+        )
+        for m in range(sprites)
+    ]
+
+
+def make_af(seed: int = 0, moves: int = 60, sprites: int = 8) -> AFFile:
+    rng = random.Random(seed)
+    af = AFFile()
+    af.sound_table = [rng.randrange(0, 255) for _ in range(30)]
+    for move_no in range(moves):
+        move = AFMove()
+        fill_animation(rng, move, sprites, move_no * sprites)
+        move.category = MoveCategory(rng.randrange(0, 14))
+        move.extra_string_selector = ExtraStringSelector.NONE
+        move.move_string = "F1"
+        move.enemy_string = "A1-B2"
+        af.moves[move_no] = move
+    return af
+
+
+def make_bk(seed: int = 0, animations: int = 50, sprites: int = 6) -> BKFile:
+    rng = random.Random(seed)
+    bk = BKFile()
+    bk.background_width = 320
+    bk.background_height = 200
+    bk.background_image = [rng.randrange(0, 256) for _ in range(320 * 200)]
+    bk.sound_table = [rng.randrange(0, 255) for _ in range(30)]
+    for anim_no in range(animations):
+        anim = BKAnimation()
+        fill_animation(rng, anim, sprites, 0)
+        anim.footer_string = "a1"
+        bk.animations[anim_no] = anim
+    for _ in range(4):
+        mapping = PaletteMapping()
+        mapping.colors.data = [
+            (rng.choice(VGA_LEVELS), rng.choice(VGA_LEVELS), rng.choice(VGA_LEVELS))
+            for _ in range(256)
+        ]
+        mapping.remaps = [
+            [rng.randrange(0, 256) for _ in range(256)] for _ in range(19)
+        ]
+        bk.palettes.append(mapping)
+    return bk
+
+
+def timed(fn: typing.Callable[[], typing.Any], repeat: int = 5) -> float:
+    from time import perf_counter
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        best = min(best, perf_counter() - start)
+    return best
@@ -1,12 +1,20 @@
 import argparse
+import os
 
 from omftools.pyshadowdive.af import AFFile
+from omftools.pyshadowdive.project import load_project
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Compile AF file from JSON")
-    parser.add_argument("input_file", help="Input .json file")
+    parser = argparse.ArgumentParser(description="Compile AF file from JSON or CBOR")
+    parser.add_argument(
+        "input_file", help="Input .json or .cbor file, or project directory"
+    )
     parser.add_argument("output_file", help="Output .AF file")
     args = parser.parse_args()
 
-    AFFile.load_json(args.input_file).save_native(args.output_file)
+    if os.path.isdir(args.input_file):
+        obj = load_project(AFFile, args.input_file)
+    else:
+        obj = AFFile.load_document(args.input_file)
+    obj.save_native(args.output_file)
     exit(0)
@@ -32,7 +32,7 @@ class AnimString:
 
 def process_af(af_file) -> list[AnimString]:
     source_file = os.path.basename(af_file)
-    af = AFFile.load_native(af_file)
+    af = AFFile.load_native(af_file, sprites=False)
     out: list[AnimString] = []
     for animation_index, move in af.moves.items():  # type: int, AFMove
         if move.base_string:
@@ -71,7 +71,7 @@ def process_af(af_file) -> list[AnimString]:
 
 def process_bk(bk_file) -> list[AnimString]:
     source_file = os.path.basename(bk_file)
-    bk = BKFile.load_native(bk_file)
+    bk = BKFile.load_native(bk_file, sprites=False, background=False, palettes=False)
     out: list[AnimString] = []
     for animation_index, animation in bk.animations.items():  # type: int, BKAnimation
         if animation.footer_string:
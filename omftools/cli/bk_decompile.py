@@ -1,12 +1,51 @@
 import argparse
 
 from omftools.pyshadowdive.bk import BKFile
+from omftools.pyshadowdive.project import save_project
+from omftools.pyshadowdive.utils.json_backends import available_backends, get_backend
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Decompile BK file to JSON")
+    parser = argparse.ArgumentParser(description="Decompile BK file to JSON or CBOR")
     parser.add_argument("input_file", help="Input .BK file")
-    parser.add_argument("output_file", help="Output .json file")
+    parser.add_argument(
+        "output_file", help="Output .json or .cbor file, or directory with --split"
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Store image and sample data as base64 strings in JSON",
+    )
+    parser.add_argument(
+        "--split",
+        action="store_true",
+        help="Write a directory with a file per animation and sprite",
+    )
+    parser.add_argument(
+        "--sprites",
+        choices=("png", "raw"),
+        default="png",
+        help=(
+            "Sprite format with --split: indexed PNG (same pixels, but the "
+            "image data is re-encoded on compile) or raw RLE data (byte exact)"
+        ),
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=available_backends(),
+        help="JSON encoder to use, by default the one from $OMFTOOLS_JSON_BACKEND "
+        "or the stdlib",
+    )
     args = parser.parse_args()
+    backend = get_backend(args.json_backend)
 
-    BKFile.load_native(args.input_file).save_json(args.output_file, indent=4)
+    obj = BKFile.load_native(args.input_file)
+    if args.split:
+        save_project(obj, args.output_file, sprite_format=args.sprites)
+    else:
+        obj.save_document(
+            args.output_file,
+            compact=args.compact,
+            indent=backend.indent,
+            backend=backend.name,
+        )
     exit(0)
@@ -18,6 +18,7 @@ from omftools.pyshadowdive.altpals import AltPaletteFile
 from omftools.pyshadowdive.utils.exceptions import OMFInvalidDataException
 from omftools.pyshadowdive.palette import Palette
 from omftools.pyshadowdive.language import LanguageFile
+from omftools.pyshadowdive.utils.atlas import SpriteAtlas
 
 env = Environment(
     loader=PackageLoader(__name__), autoescape=select_autoescape(["html"])
@@ -156,7 +157,9 @@ def generate_trn(file: str, files: Filenames, output_dir: str) -> None:
         fd.write(render("trn_index.html", files, filename, trn=trn))
 
 
-def generate_bk(file: str, files: Filenames, output_dir: str) -> None:
+def generate_bk(
+    file: str, files: Filenames, output_dir: str, atlas: bool = False
+) -> None:
     filename = os.path.basename(file)
     bk = BKFile.load_native(file)
 
@@ -164,40 +167,71 @@ def generate_bk(file: str, files: Filenames, output_dir: str) -> None:
 
     pal = copy.deepcopy(bk.palettes[0].colors)
 
-    for key, animation in bk.animations.items():
-        for idx, sprite in enumerate(animation.sprites):
+    sprite_atlas = None
+    if atlas:
+        sprite_atlas = SpriteAtlas.build(
+            {key: animation.sprites for key, animation in bk.animations.items()},
+            pal,
+        )
+        sprite_atlas.save(output_dir, filename)
+        for key, idx in sprite_atlas.skipped:
             sprite_file = os.path.join(output_dir, f"{filename}-{key}-{idx}.png")
-            try:
-                sprite.save_png(sprite_file, pal)
-            except OMFInvalidDataException:
-                print(f"Skipping {sprite_file}")
+            print(f"Skipping {sprite_file}")
+    else:
+        for key, animation in bk.animations.items():
+            for idx, sprite in enumerate(animation.sprites):
+                sprite_file = os.path.join(output_dir, f"{filename}-{key}-{idx}.png")
+                try:
+                    sprite.save_png(sprite_file, pal)
+                except OMFInvalidDataException:
+                    print(f"Skipping {sprite_file}")
 
     with open(os.path.join(output_dir, f"{filename}.html"), "wb") as fd:
-        fd.write(render("bk_index.html", files, filename, bk=bk))
+        fd.write(render("bk_index.html", files, filename, bk=bk, atlas=sprite_atlas))
 
 
 def generate_af(
-    file: str, files: Filenames, output_dir: str, alt_pals: AltPaletteFile
+    file: str,
+    files: Filenames,
+    output_dir: str,
+    alt_pals: AltPaletteFile,
+    atlas: bool = False,
 ) -> None:
     filename = os.path.basename(file)
     af = AFFile.load_native(file)
 
-    for key, animation in af.moves.items():
-        for idx, sprite in enumerate(animation.sprites):
+    sprite_atlas = None
+    if atlas:
+        sprite_atlas = SpriteAtlas.build(
+            {key: move.sprites for key, move in af.moves.items()},
+            alt_pals.palettes[0],
+        )
+        sprite_atlas.save(output_dir, filename)
+        for key, idx in sprite_atlas.skipped:
             sprite_file = os.path.join(output_dir, f"{filename}-{key}-{idx}.png")
-            try:
-                sprite.save_png(sprite_file, alt_pals.palettes[0])
-            except OMFInvalidDataException:
-                print(f"Skipping {sprite_file}")
+            print(f"Skipping {sprite_file}")
+    else:
+        for key, animation in af.moves.items():
+            for idx, sprite in enumerate(animation.sprites):
+                sprite_file = os.path.join(output_dir, f"{filename}-{key}-{idx}.png")
+                try:
+                    sprite.save_png(sprite_file, alt_pals.palettes[0])
+                except OMFInvalidDataException:
+                    print(f"Skipping {sprite_file}")
 
     with open(os.path.join(output_dir, f"{filename}.html"), "wb") as fd:
-        fd.write(render("af_index.html", files, filename, af=af))
+        fd.write(render("af_index.html", files, filename, af=af, atlas=sprite_atlas))
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Generate HTML pages for OMF files")
     parser.add_argument("input_dir", help="Input directory")
     parser.add_argument("output_dir", help="Output directory")
+    parser.add_argument(
+        "--atlas",
+        action="store_true",
+        help="Pack AF and BK sprites into atlas images with a JSON manifest",
+    )
     args = parser.parse_args()
 
     af_files = glob(os.path.join(args.input_dir, "*.AF"))
@@ -246,11 +280,11 @@ def main() -> None:
 
     for af_file in af_files:
         print(f"Generating {af_file}")
-        generate_af(af_file, files, args.output_dir, alt_pals)
+        generate_af(af_file, files, args.output_dir, alt_pals, args.atlas)
 
     for bk_file in bk_files:
         print(f"Generating {bk_file}")
-        generate_bk(bk_file, files, args.output_dir)
+        generate_bk(bk_file, files, args.output_dir, args.atlas)
 
     copyfile(
         os.path.join(args.output_dir, f"ARENA0.BK.html"),
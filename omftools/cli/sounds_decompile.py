@@ -1,12 +1,32 @@
 import argparse
 
 from omftools.pyshadowdive.sounds import SoundFile
+from omftools.pyshadowdive.utils.json_backends import available_backends, get_backend
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Decompile SOUNDS.DAT file to JSON")
+    parser = argparse.ArgumentParser(
+        description="Decompile SOUNDS.DAT file to JSON or CBOR"
+    )
     parser.add_argument("input_file", help="Input .AF file")
-    parser.add_argument("output_file", help="Output .json file")
+    parser.add_argument("output_file", help="Output .json or .cbor file")
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Store image and sample data as base64 strings in JSON",
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=available_backends(),
+        help="JSON encoder to use, by default the one from $OMFTOOLS_JSON_BACKEND "
+        "or the stdlib",
+    )
     args = parser.parse_args()
+    backend = get_backend(args.json_backend)
 
-    SoundFile().load_native(args.input_file).save_json(args.output_file, indent=4)
+    SoundFile().load_native(args.input_file).save_document(
+        args.output_file,
+        compact=args.compact,
+        indent=backend.indent,
+        backend=backend.name,
+    )
     exit(0)
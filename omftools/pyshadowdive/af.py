@@ -1,17 +1,54 @@
 from __future__ import annotations
+import functools
+import hashlib
+import json
+import os
 import typing
 from validx import Dict, List, Str
 
 from .protos import Entrypoint
 from .afmove import AFMove
 from .sprite import Sprite
-from .utils.parser import BinaryParser
+from .utils.parser import BinaryParser, BufferParser
 
 from .utils.validator import UInt8, UInt16, UInt32, Int32
 
+# Sprite offset, length, sprite index and missing flag
+AFSpriteSpan = tuple[int, int, int, bool]
+
+# Move offset, length and spans of all sprites in the move
+AFMoveSpan = tuple[int, int, list[AFSpriteSpan]]
+
+AFIndex = dict[int, AFMoveSpan]
+
+# Number of bytes from the start of the file hashed into the sidecar key
+SIDECAR_HASH_SIZE = 4096
+
+
+class _IndexedMove(AFMove):
+    # Records the position of each sprite while the move is being read
+    __slots__ = ("sprite_spans",)
+
+    def __init__(self) -> None:
+        super(_IndexedMove, self).__init__()
+        self.sprite_spans: list[AFSpriteSpan] = []
+
+    def read_sprites(
+        self, parser: BinaryParser, count: int, load_images: bool
+    ) -> list[Sprite]:
+        sprites: list[Sprite] = []
+        for _ in range(count):
+            start = parser.get_pos()
+            sprite = Sprite().read(parser, load_images)
+            length = parser.get_pos() - start
+            self.sprite_spans.append((start, length, sprite.index, sprite.missing))
+            sprites.append(sprite)
+        return sprites
+
 
 class AFFile(Entrypoint):
     MOVE_MAX_NUMBER = 70
+    HEADER_SIZE: typing.Final[int] = 29
 
     __slots__ = (
         "file_id",
@@ -62,6 +99,10 @@ class AFFile(Entrypoint):
         self.moves: dict[int, AFMove] = {}
         self.sound_table: list[int] = []
 
+    def materialize(self) -> None:
+        for move in self.moves.values():
+            move.materialize()
+
     def serialize(self) -> dict[str, typing.Any]:
         return {
             "file_id": self.file_id,
@@ -95,7 +136,7 @@ class AFFile(Entrypoint):
         self.sound_table = data["sound_table"]
         return self
 
-    def read(self, parser: BinaryParser) -> AFFile:
+    def read(self, parser: BinaryParser, sprites: bool = True) -> AFFile:
         self.file_id = parser.get_uint16()
         self.exec_window = parser.get_uint16()
         self.endurance = parser.get_uint32()
@@ -113,7 +154,7 @@ class AFFile(Entrypoint):
             move_no = parser.get_uint8()
             if move_no >= self.MOVE_MAX_NUMBER:
                 break
-            self.moves[move_no] = AFMove().read(parser)
+            self.moves[move_no] = AFMove().read(parser, sprites)
 
         # Find missing image data by index
         index_table: typing.Dict[int, Sprite] = {}
@@ -121,7 +162,7 @@ class AFFile(Entrypoint):
             for idx, sprite in enumerate(m.sprites):
                 if sprite.missing:
                     if sprite.index in index_table:
-                        sprite.image = index_table[sprite.index].image
+                        sprite.link_image(index_table[sprite.index])
                 else:
                     index_table[sprite.index] = sprite
 
@@ -131,6 +172,61 @@ class AFFile(Entrypoint):
 
         return self
 
+    @classmethod
+    def read_index(cls, parser: BinaryParser) -> AFIndex:
+        # AF files have no offset table, so walk the moves while skipping
+        # over the sprite bodies.
+        index: AFIndex = {}
+        parser.set_pos(cls.HEADER_SIZE)
+        while True:
+            move_no = parser.get_uint8()
+            if move_no >= cls.MOVE_MAX_NUMBER:
+                break
+            start = parser.get_pos()
+            move = _IndexedMove()
+            move.read(parser, sprites=False)
+            index[move_no] = (start, parser.get_pos() - start, move.sprite_spans)
+        return index
+
+    @classmethod
+    def index(cls, filename: str, sidecar: bool = False) -> AFIndex:
+        # Indexes are cached in memory by path, size and mtime. With sidecar,
+        # the index is also stored next to the file as <filename>.idx.
+        stat = os.stat(filename)
+        return _load_af_index(
+            os.path.abspath(filename), stat.st_size, stat.st_mtime_ns, sidecar
+        )
+
+    @classmethod
+    def load_move(
+        cls,
+        filename: str,
+        move_no: int,
+        index: AFIndex | None = None,
+        sprites: bool = True,
+        sidecar: bool = False,
+    ) -> AFMove:
+        if index is None:
+            index = cls.index(filename, sidecar)
+        offset, length, spans = index[move_no]
+        with open(filename, "rb") as handle:
+            handle.seek(offset)
+            move = AFMove().read(BufferParser(handle.read(length)), sprites)
+            if not sprites:
+                return move
+
+            # Missing sprites use the image of the last earlier sprite with
+            # the same index, same as in read().
+            for position, sprite in enumerate(move.sprites):
+                if not sprite.missing:
+                    continue
+                source = _find_sprite_source(index, move_no, position, sprite.index)
+                if source is not None:
+                    handle.seek(source[0])
+                    data = handle.read(source[1])
+                    sprite.link_image(Sprite().read(BufferParser(data)))
+        return move
+
     def write(self, parser: BinaryParser) -> None:
         parser.put_uint16(self.file_id)
         parser.put_uint16(self.exec_window)
@@ -195,3 +291,51 @@ class AFFile(Entrypoint):
     @real_fall_speed.setter
     def real_fall_speed(self, value: float) -> None:
         self.fall_speed = int(value * 256.0)
+
+
+def _find_sprite_source(
+    index: AFIndex, move_no: int, position: int, sprite_index: int
+) -> tuple[int, int] | None:
+    source: tuple[int, int] | None = None
+    for key, (_, _, spans) in index.items():
+        for m, (offset, length, other_index, missing) in enumerate(spans):
+            if key == move_no and m == position:
+                return source
+            if not missing and other_index == sprite_index:
+                source = (offset, length)
+    return source
+
+
+@functools.lru_cache(maxsize=32)
+def _load_af_index(filename: str, size: int, mtime_ns: int, sidecar: bool) -> AFIndex:
+    # The sidecar is keyed on size, mtime and a hash of the start of the
+    # file, so that a valid sidecar is used without reading the whole file.
+    with open(filename, "rb") as handle:
+        head = handle.read(SIDECAR_HASH_SIZE)
+    key = {"size": size, "mtime_ns": mtime_ns, "sha1": hashlib.sha1(head).hexdigest()}
+    sidecar_file = f"{filename}.idx"
+
+    if sidecar:
+        try:
+            with open(sidecar_file, "rb") as handle:
+                stored = json.loads(handle.read().decode())
+            if stored["key"] == key:
+                return {
+                    int(move_no): (offset, length, [tuple(s) for s in spans])
+                    for move_no, (offset, length, spans) in stored["moves"].items()
+                }
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    with open(filename, "rb") as handle:
+        data = handle.read()
+    index = AFFile.read_index(BufferParser(data))
+    if sidecar:
+        # The sidecar is only a cache, so a directory that can not be written
+        # to (such as an install directory) is not an error.
+        try:
+            with open(sidecar_file, "wb") as handle:
+                handle.write(json.dumps({"key": key, "moves": index}).encode())
+        except OSError:
+            pass
+    return index
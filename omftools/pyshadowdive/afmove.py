@@ -191,8 +191,8 @@ class AFMove(Animation):
     def has_move_string(self):
         return self.move_string not in ['"!"', "!", "0"]
 
-    def read(self, parser: BinaryParser) -> AFMove:
-        super(AFMove, self).read(parser)
+    def read(self, parser: BinaryParser, sprites: bool = True) -> AFMove:
+        super(AFMove, self).read(parser, sprites)
         self.ai_opts = AIOptions(parser.get_uint16())
         self.pos_constraint = PositionConstraint(parser.get_uint16())
         self.unknown_4 = parser.get_uint8()
@@ -287,7 +287,7 @@ class AFMove(Animation):
         self.successor_id = data["successor_id"]
         self.damage_amount = data["damage_amount"]
         self.throw_duration = data["throw_duration"]
-        self.extra_string_selector = data["extra_string_selector"]
+        self.extra_string_selector = ExtraStringSelector(data["extra_string_selector"])
         self.points = data["points"]
         self.move_string = data["move_string"]
         self.enemy_string = data["enemy_string"]
@@ -46,7 +46,7 @@ class Animation(DataObject):
         self.base_string: str = ""
         self.extra_strings: list[str] = []
 
-    def read(self, parser: BinaryParser) -> Animation:
+    def read(self, parser: BinaryParser, sprites: bool = True) -> Animation:
         self.start_x = parser.get_int16()
         self.start_y = parser.get_int16()
         assert parser.get_uint32() == 0
@@ -72,10 +72,15 @@ class Animation(DataObject):
         extra_str_count = parser.get_uint8()
 
         self.extra_strings = [parser.get_var_str() for _ in range(extra_str_count)]
-        self.sprites = [Sprite().read(parser) for _ in range(sprite_count)]
+        self.sprites = self.read_sprites(parser, sprite_count, sprites)
 
         return self
 
+    def read_sprites(
+        self, parser: BinaryParser, count: int, load_images: bool
+    ) -> list[Sprite]:
+        return [Sprite().read(parser, load_images) for _ in range(count)]
+
     def write(self, parser: BinaryParser) -> None:
         parser.put_int16(self.start_x)
         parser.put_int16(self.start_y)
@@ -106,6 +111,10 @@ class Animation(DataObject):
         for sprite in self.sprites:
             sprite.write(parser)
 
+    def materialize(self) -> None:
+        for sprite in self.sprites:
+            sprite.materialize()
+
     def serialize(self) -> dict:
         return {
             "start_x": self.start_x,
@@ -1,20 +1,24 @@
 from __future__ import annotations
 import typing
 from validx import Dict, List, Str
-import io
 
 from .protos import Entrypoint
 from .bkanim import BKAnimation
 from .palette_mapping import PaletteMapping
 
-from .utils.parser import BinaryParser
+from .utils.parser import BinaryParser, BufferParser
 from .utils.types import EncodedImage
-from .utils.validator import UInt16, UInt32, UInt8
+from .utils.validator import UInt16, UInt32, UInt8, UInt8Array
 from .utils.images import generate_png, save_png
+from .utils.exceptions import OMFInvalidDataException
+
+# Animation number -> (offset, length) of the animation body
+BKIndex = dict[int, tuple[int, int]]
 
 
 class BKFile(Entrypoint):
     ANIMATION_MAX_NUMBER: typing.Final[int] = 50
+    HEADER_SIZE: typing.Final[int] = 9
 
     __slots__ = (
         "file_id",
@@ -25,6 +29,7 @@ class BKFile(Entrypoint):
         "animations",
         "sound_table",
         "palettes",
+        "_skipped",
     )
 
     schema = Dict(
@@ -33,7 +38,7 @@ class BKFile(Entrypoint):
             "unknown_a": UInt8,
             "background_width": UInt16,
             "background_height": UInt16,
-            "background_image": List(UInt8),
+            "background_image": UInt8Array(),
             "animations": Dict(extra=(Str(pattern=r"^[0-9]+$"), BKAnimation.schema)),
             "sound_table": List(UInt8, maxlen=30, minlen=30),
             "palettes": List(PaletteMapping.schema),
@@ -48,15 +53,32 @@ class BKFile(Entrypoint):
         self.animations: dict[int, BKAnimation] = {}
         self.palettes: list[PaletteMapping] = []
         self.sound_table: list[int] = []
-        self.background_image: EncodedImage = []
+        self.background_image: EncodedImage = b""
+        # Background or palettes skipped over on read, see check_loaded()
+        self._skipped: list[str] = []
+
+    def materialize(self) -> None:
+        self.background_image = bytes(self.background_image)
+        for animation in self.animations.values():
+            animation.materialize()
+        for palette in self.palettes:
+            palette.materialize()
+
+    def check_loaded(self) -> None:
+        if self._skipped:
+            raise OMFInvalidDataException(
+                f"BK file was loaded without {' and '.join(self._skipped)}, "
+                "so it can not be saved"
+            )
 
     def serialize(self) -> dict:
+        self.check_loaded()
         return {
             "file_id": self.file_id,
             "unknown_a": self.unknown_a,
             "background_width": self.background_width,
             "background_height": self.background_height,
-            "background_image": self.background_image,
+            "background_image": bytes(self.background_image),
             "animations": {k: v.serialize() for k, v in self.animations.items()},
             "palettes": [palette.serialize() for palette in self.palettes],
             "sound_table": self.sound_table,
@@ -67,19 +89,27 @@ class BKFile(Entrypoint):
         self.unknown_a = data["unknown_a"]
         self.background_width = data["background_width"]
         self.background_height = data["background_height"]
-        self.background_image = data["background_image"]
+        self.background_image = bytes(data["background_image"])
         self.sound_table = data["sound_table"]
         self.palettes = [PaletteMapping().unserialize(v) for v in data["palettes"]]
         self.animations = {
             int(k): BKAnimation().unserialize(v) for k, v in data["animations"].items()
         }
+        self._skipped = []
         return self
 
-    def read(self, parser: BinaryParser) -> BKFile:
+    def read(
+        self,
+        parser: BinaryParser,
+        sprites: bool = True,
+        background: bool = True,
+        palettes: bool = True,
+    ) -> BKFile:
         self.file_id = parser.get_uint32()
         self.unknown_a = parser.get_uint8()
         self.background_width = parser.get_uint16()
         self.background_height = parser.get_uint16()
+        self._skipped = []
 
         # Read all animations (up to max ANIMATION_MAX_NUMBER)
         while True:
@@ -87,50 +117,95 @@ class BKFile(Entrypoint):
             anim_no = parser.get_uint8()
             if anim_no >= self.ANIMATION_MAX_NUMBER:
                 break
-            self.animations[anim_no] = BKAnimation().read(parser)
+            self.animations[anim_no] = BKAnimation().read(parser, sprites)
 
         # Read the raw Background image (VGA palette format)
         background_size = self.background_height * self.background_width
-        self.background_image = [parser.get_uint8() for _ in range(background_size)]
+        if background:
+            self.background_image = parser.get_uint8_array(background_size)
+        else:
+            parser.skip(background_size)
+            self._skipped.append("background")
 
         # Read up all available color palettes
         palette_count = parser.get_uint8()
-        self.palettes = [PaletteMapping().read(parser) for _ in range(palette_count)]
+        if palettes:
+            self.palettes = [
+                PaletteMapping().read(parser) for _ in range(palette_count)
+            ]
+        else:
+            parser.skip(palette_count * PaletteMapping.BLOCK_SIZE)
+            self._skipped.append("palettes")
 
         # Get sound mappings
         self.sound_table = [parser.get_uint8() for _ in range(30)]
 
         return self
 
+    @classmethod
+    def read_index(cls, parser: BinaryParser) -> BKIndex:
+        # Each animation is preceded by the offset of the next one, so the
+        # animation block can be walked without parsing animation bodies.
+        index: BKIndex = {}
+        file_size = parser.get_file_size()
+        parser.set_pos(cls.HEADER_SIZE)
+        while True:
+            next_offset = parser.get_uint32()
+            anim_no = parser.get_uint8()
+            if anim_no >= cls.ANIMATION_MAX_NUMBER:
+                break
+            start = parser.get_pos()
+            # Offsets must move forward, or a broken chain would never end
+            if next_offset <= start or next_offset > file_size:
+                raise OMFInvalidDataException(
+                    f"Invalid offset {next_offset} after animation {anim_no}"
+                )
+            index[anim_no] = (start, next_offset - start)
+            parser.set_pos(next_offset)
+        return index
+
+    @classmethod
+    def index(cls, filename: str) -> BKIndex:
+        with open(filename, "rb") as handle:
+            return cls.read_index(BinaryParser(handle))
+
+    @classmethod
+    def load_animation(
+        cls,
+        filename: str,
+        anim_no: int,
+        index: BKIndex | None = None,
+        sprites: bool = True,
+    ) -> BKAnimation:
+        if index is None:
+            index = cls.index(filename)
+        offset, length = index[anim_no]
+        with open(filename, "rb") as handle:
+            handle.seek(offset)
+            data = handle.read(length)
+        return BKAnimation().read(BufferParser(data), sprites)
+
     def write(self, parser: BinaryParser) -> None:
+        self.check_loaded()
         parser.put_uint32(self.file_id)
         parser.put_uint8(self.unknown_a)
         parser.put_uint16(self.background_width)
         parser.put_uint16(self.background_height)
 
         for key, ani in self.animations.items():
-            # Write animation to binary buffer so that
-            # we can tell its length
-            buf = io.BytesIO()
-            ani.write(BinaryParser(buf))
-            ani_data = buf.getvalue()
-
-            # Write offset of next animation, then ID,
-            # then the animation blob. Add +5 to offset to account
-            # for the next offset and ID.
-            offset = parser.get_pos() + len(ani_data) + 5
-            parser.put_uint32(offset)
+            # Reserve the offset of next animation, then write ID and
+            # the animation itself. Offset is filled in once we know
+            # where the animation ends.
+            next_offset = parser.reserve_uint32()
             parser.put_uint8(key)
-            parser.put_bytes(ani_data)
-
-            buf.close()
+            ani.write(parser)
+            parser.patch_uint32(next_offset, parser.get_pos())
 
         # Write ending of the animations block
         parser.put_uint32(parser.get_pos())
         parser.put_uint8(self.ANIMATION_MAX_NUMBER + 1)
 
-        for pixel in self.background_image:
-            parser.put_uint8(pixel)
+        parser.put_uint8_array(self.background_image)
 
         parser.put_uint8(len(self.palettes))
         for pal in self.palettes:
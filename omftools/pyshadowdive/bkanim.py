@@ -65,7 +65,7 @@ class BKAnimation(Animation):
             return BK_ANIMATION_NAMES[index]
         return None
 
-    def read(self, parser: BinaryParser) -> BKAnimation:
+    def read(self, parser: BinaryParser, sprites: bool = True) -> BKAnimation:
         self.null = parser.get_uint8()
         self.chain_hit = parser.get_uint8()
         self.chain_no_hit = parser.get_uint8()
@@ -73,7 +73,7 @@ class BKAnimation(Animation):
         self.probability = parser.get_uint16()
         self.hazard_damage = parser.get_uint8()
         self.footer_string = parser.get_var_str(size_includes_zero=True)
-        super(BKAnimation, self).read(parser)
+        super(BKAnimation, self).read(parser, sprites)
         return self
 
     def write(self, parser: BinaryParser) -> None:
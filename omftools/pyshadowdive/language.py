@@ -3,29 +3,37 @@ import typing
 
 from .protos import Entrypoint
 from .utils.parser import BinaryParser
+from .utils.lazy import LazySequence
 
 
 class LanguageFile(Entrypoint):
     __slots__ = (
         "titles",
         "strings",
+        "_title_index",
     )
 
     def __init__(self) -> None:
         self.titles: list[str] = []
-        self.strings: list[str] = []
+        self.strings: typing.Sequence[str] = []
+        self._title_index: dict[str, int] | None = None
+
+    def materialize(self) -> None:
+        self.strings = list(self.strings)
 
     def serialize(self) -> dict:
         return {
             "titles": self.titles,
-            "strings": self.strings,
+            "strings": list(self.strings),
         }
 
-    def read(self, parser: BinaryParser) -> LanguageFile:
+    def read_table(self, parser: BinaryParser) -> list[int]:
         file_size = parser.get_file_size()
 
         # Read titles and offsets
         offsets: list[int] = []
+        self.titles = []
+        self._title_index = None
         while True:
             offset = parser.get_uint32()
             if offset >= file_size:
@@ -33,11 +41,44 @@ class LanguageFile(Entrypoint):
             offsets.append(offset)
             self.titles.append(parser.get_null_padded_str(32))
         offsets.append(file_size)
+        return offsets
 
-        for m in range(len(offsets) - 1):
-            block_size = offsets[m + 1] - offsets[m]
-            parser.set_pos(offsets[m])
-            parser.set_xor_key(block_size & 0xFF)
-            self.strings.append(parser.get_null_padded_str(block_size))
+    @staticmethod
+    def read_block(parser: BinaryParser, offsets: list[int], m: int) -> str:
+        block_size = offsets[m + 1] - offsets[m]
+        parser.set_pos(offsets[m])
+        parser.set_xor_key(block_size & 0xFF)
+        data = parser.get_null_padded_str(block_size)
+        parser.set_xor_key(None)
+        return data
 
+    def read(self, parser: BinaryParser) -> LanguageFile:
+        offsets = self.read_table(parser)
+        self.strings = [
+            self.read_block(parser, offsets, m) for m in range(len(offsets) - 1)
+        ]
         return self
+
+    @classmethod
+    def open(cls, filename: str, cache_size: int = 64) -> LanguageFile:
+        # Reads only the title and offset table. String blocks are decrypted
+        # one at a time when requested, and recent ones are cached.
+        parser = cls.map_file(filename)
+        obj = cls()
+        offsets = obj.read_table(parser)
+        obj._mapped = parser
+        obj.strings = LazySequence(
+            len(offsets) - 1, lambda m: cls.read_block(parser, offsets, m), cache_size
+        )
+        return obj
+
+    def get(self, index: int) -> str:
+        return self.strings[index]
+
+    def get_by_title(self, title: str) -> str:
+        # Titles are not unique; the first string with a matching title wins
+        if self._title_index is None:
+            self._title_index = {}
+            for m, t in enumerate(self.titles):
+                self._title_index.setdefault(t, m)
+        return self.strings[self._title_index[title]]
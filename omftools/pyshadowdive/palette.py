@@ -1,4 +1,7 @@
 from __future__ import annotations
+import itertools
+import typing
+
 from validx import Dict, List, Tuple
 
 from .protos import DataObject
@@ -6,14 +9,35 @@ from .utils.parser import BinaryParser
 from .utils.validator import UInt8
 from .utils.types import Color, Remapping
 
+# VGA DAC values are 6-bit. These give the same results as scaling with
+# int((v * 255.0) / 63.0) and int((c * 63.0) / 255.0).
+VGA_6_TO_8 = bytes(int((v * 255.0) / 63.0) for v in range(64))
+VGA_8_TO_6 = bytes(int((c * 63.0) / 255.0) for c in range(256))
+_READ_TABLE = VGA_6_TO_8 + bytes(256 - 64)
+
 
 class Palette(DataObject):
-    __slots__ = ("data",)
+    __slots__ = (
+        "data",
+        "_blob",
+        "_blob_source",
+    )
 
     schema = Dict({"data": List(Tuple(UInt8, UInt8, UInt8))})
 
     def __init__(self) -> None:
         self.data: list[Color] = [(0, 0, 0) for _ in range(256)]
+        self._blob: bytes = b""
+        self._blob_source: typing.Optional[list[Color]] = None
+
+    def as_bytes(self) -> bytes:
+        # Flat RGB palette as used by PIL. This is cached, and rebuilt only if
+        # the colors have changed since; comparing against a snapshot also
+        # catches in-place edits of the data list.
+        if self._blob_source != self.data:
+            self._blob = bytes(itertools.chain.from_iterable(self.data))
+            self._blob_source = list(self.data)
+        return self._blob
 
     def remap(self, remapping: Remapping) -> Palette:
         pal = Palette()
@@ -21,39 +45,38 @@ class Palette(DataObject):
         return pal
 
     @staticmethod
-    def _read_one(parser) -> Color:
-        r = parser.get_uint8()
-        g = parser.get_uint8()
-        b = parser.get_uint8()
-        r_8 = int((r * 255.0) / 63.0)
-        g_8 = int((g * 255.0) / 63.0)
-        b_8 = int((b * 255.0) / 63.0)
-        return r_8, g_8, b_8
+    def _read_colors(parser: BinaryParser, length: int) -> list[Color]:
+        raw = bytes(parser.get_uint8_array(length * 3))
+        if max(raw, default=0) < 64:
+            values: typing.Sequence[int] = raw.translate(_READ_TABLE)
+        else:
+            # Out of range 6-bit values scale past 255, so they cannot go
+            # through a byte table
+            values = [int((v * 255.0) / 63.0) for v in raw]
+        it = iter(values)
+        return list(zip(it, it, it))
 
     def read_range(self, parser: BinaryParser, start: int, length: int) -> Palette:
-        for m in range(start, start + length):
-            self.data[m] = self._read_one(parser)
+        self.data[start : start + length] = self._read_colors(parser, length)
         return self
 
     def read(self, parser: BinaryParser) -> Palette:
-        self.data.clear()
-        for m in range(0, 256):
-            self.data.append(self._read_one(parser))
+        self.data = self._read_colors(parser, 256)
         return self
 
-    @staticmethod
-    def _write_one(parser: BinaryParser, c: Color) -> None:
-        parser.put_uint8(int((c[0] * 63.0) / 255.0))
-        parser.put_uint8(int((c[1] * 63.0) / 255.0))
-        parser.put_uint8(int((c[2] * 63.0) / 255.0))
-
     def write_range(self, parser: BinaryParser, start: int, length: int) -> None:
-        for m in range(start, start + length):
-            self._write_one(parser, self.data[m])
+        components = list(
+            itertools.chain.from_iterable(self.data[start : start + length])
+        )
+        if max(components, default=0) < 256:
+            out = bytes(components).translate(VGA_8_TO_6)
+        else:
+            # Components above 255 come from out of range 6-bit values
+            out = bytes(int((v * 63.0) / 255.0) for v in components)
+        parser.put_uint8_array(out)
 
     def write(self, parser: BinaryParser) -> None:
-        for m in range(0, 256):
-            self._write_one(parser, self.data[m])
+        self.write_range(parser, 0, 256)
 
     def serialize(self) -> dict:
         return {
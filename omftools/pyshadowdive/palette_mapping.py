@@ -1,19 +1,22 @@
+import typing
 from validx import Dict, List
 
 from .protos import DataObject
 from .palette import Palette
 from .utils.parser import BinaryParser
-from .utils.validator import UInt8
-from .utils.types import Remappings, Remapping
+from .utils.validator import UInt8Array
+from .utils.types import Remappings
 
 
 class PaletteMapping(DataObject):
+    BLOCK_SIZE: typing.Final[int] = 256 * 3 + 19 * 256
+
     __slots__ = (
         "colors",
         "remaps",
     )
 
-    schema = Dict({"colors": Palette.schema, "remaps": List(List(UInt8))})
+    schema = Dict({"colors": Palette.schema, "remaps": List(UInt8Array())})
 
     def __init__(self) -> None:
         self.colors: Palette = Palette()
@@ -24,23 +27,24 @@ class PaletteMapping(DataObject):
 
     def read(self, parser: BinaryParser):
         self.colors = Palette().read(parser)
-        for k in range(0, 19):
-            remap: Remapping = []
-            for m in range(0, 256):
-                remap.append(parser.get_uint8())
-            self.remaps.append(remap)
+        self.remaps = [parser.get_uint8_array(256) for _ in range(0, 19)]
         return self
 
     def write(self, parser):
         self.colors.write(parser)
         for k in range(0, 19):
-            for m in range(0, 256):
-                parser.put_uint8(self.remaps[k][m])
+            parser.put_uint8_array(self.remaps[k])
+
+    def materialize(self) -> None:
+        self.remaps = [bytes(remap) for remap in self.remaps]
 
     def serialize(self) -> dict:
-        return {"colors": self.colors.serialize(), "remaps": self.remaps}
+        return {
+            "colors": self.colors.serialize(),
+            "remaps": [bytes(remap) for remap in self.remaps],
+        }
 
     def unserialize(self, data: dict):
         self.colors = Palette().unserialize(data["colors"])
-        self.remaps = data["remaps"]
+        self.remaps = [bytes(remap) for remap in data["remaps"]]
         return self
@@ -1,12 +1,13 @@
 from __future__ import annotations
 import typing
 from enum import IntEnum
-from copy import deepcopy
+from copy import copy
 
 from .protos import Entrypoint, DataObject
 from .sprite import Sprite
 from .palette import Palette
 from .utils.parser import BinaryParser
+from .utils.lazy import LazySequence
 
 
 class Sex(IntEnum):
@@ -30,6 +31,9 @@ class Photo(DataObject):
         self.has_photo: bool = True
         self.sprite: Sprite = Sprite()
 
+    def materialize(self) -> None:
+        self.sprite.materialize()
+
     def serialize(self) -> dict:
         return {
             "is_player": self.is_player,
@@ -56,55 +60,77 @@ class Photo(DataObject):
         self.palette.write_range(parser, 0, 48)
         parser.put_boolean(self.has_photo)
         if self.has_photo:
-            new: Sprite = deepcopy(self.sprite)
+            new: Sprite = copy(self.sprite)
             new.width -= 1
             new.height -= 1
             new.write(parser)
 
 
 class PicFile(Entrypoint):
+    CATALOG_OFFSET: typing.Final[int] = 200
+
     __slots__ = ("photos",)
 
     def __init__(self) -> None:
-        self.photos: list[Photo] = []
+        self.photos: typing.Sequence[Photo] = []
+
+    def materialize(self) -> None:
+        self.photos = list(self.photos)
+        for photo in self.photos:
+            photo.materialize()
 
     def serialize(self) -> dict:
         return {
             "photos": [p.serialize() for p in self.photos],
         }
 
-    def read(self, parser: BinaryParser) -> PicFile:
+    @classmethod
+    def read_catalog(cls, parser: BinaryParser) -> list[int]:
         photo_count = parser.get_uint32()
         assert 0 <= photo_count <= 256
 
-        parser.set_pos(200)
-        offsets = [parser.get_uint32() for _ in range(photo_count)]
+        parser.set_pos(cls.CATALOG_OFFSET)
+        return [parser.get_uint32() for _ in range(photo_count)]
+
+    def read(self, parser: BinaryParser) -> PicFile:
+        offsets = self.read_catalog(parser)
 
-        self.photos = []
+        photos: list[Photo] = []
         for offset in offsets:
             parser.set_pos(offset)
-            self.photos.append(Photo().read(parser))
+            photos.append(Photo().read(parser))
+        self.photos = photos
 
         return self
 
+    @classmethod
+    def open(cls, filename: str, cache_size: int = 8) -> PicFile:
+        # Only reads the offset catalog. Photos are parsed when indexed, and
+        # the most recently used ones are kept around.
+        parser = cls.map_file(filename)
+        offsets = cls.read_catalog(parser)
+
+        def load_photo(m: int) -> Photo:
+            parser.set_pos(offsets[m])
+            return Photo().read(parser)
+
+        obj = cls()
+        obj._mapped = parser
+        obj.photos = LazySequence(len(offsets), load_photo, cache_size)
+        return obj
+
     def write(self, parser: BinaryParser) -> None:
         photos_count = len(self.photos)
-        catalog_offset = 200
+        catalog_offset = self.CATALOG_OFFSET
 
         # Initial block from 0 to 200
         parser.put_uint32(photos_count)
         parser.put_padding(catalog_offset - 4)
 
-        # Offset catalog -- Just fill with 0 at first
-        for m in range(photos_count):
-            parser.put_uint32(0)
-
-        # Actual photo data. Write photo, then fill offset in catalog
-        for m, photo in enumerate(self.photos):
-            current = parser.get_pos()
-            # Write catalog
-            parser.set_pos(catalog_offset + m * 4)
-            parser.put_uint32(current)
-            # Write data
-            parser.set_pos(current)
+        # Offset catalog -- Just reserve the slots at first
+        catalog = [parser.reserve_uint32() for _ in range(photos_count)]
+
+        # Actual photo data. Fill offset in catalog, then write photo
+        for slot, photo in zip(catalog, self.photos):
+            parser.patch_uint32(slot, parser.get_pos())
             photo.write(parser)
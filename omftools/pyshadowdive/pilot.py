@@ -4,7 +4,7 @@ from enum import IntEnum
 
 from .protos import DataObject
 from .palette import Palette
-from .utils.parser import BinaryParser
+from .utils.parser import BinaryParser, BufferParser
 
 
 class Har(IntEnum):
@@ -366,7 +366,7 @@ class Pilot(DataObject):
             "total_value": self.total_value,
             "unk_f_a": self.unk_f_a,
             "unk_f_b": self.unk_f_b,
-            "palette": self.palette,
+            "palette": self.palette.serialize(),
             "unk_block_i": self.unk_block_i,
             "photo_id": self.photo_id,
             "quotes": self.quotes,
@@ -480,10 +480,13 @@ class Pilot(DataObject):
         self.photo_id = parser.get_uint16() & 0x3FF
 
     def read(self, parser: BinaryParser) -> Pilot:
+        # Decrypt the whole pilot block at once, then parse it from memory
         parser.set_xor_key(self.PILOT_BLOCK_LENGTH & 0xFF)
-        self.unknown_a = parser.get_uint32()
-        self.read_player_block(parser)
-        self.read_pilot_block(parser)
+        block = BufferParser(parser.read(self.PILOT_BLOCK_LENGTH))
         parser.set_xor_key(None)
+
+        self.unknown_a = block.get_uint32()
+        self.read_player_block(block)
+        self.read_pilot_block(block)
         self.quotes = [parser.get_var_str(size_includes_zero=True) for _ in range(10)]
         return self
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import os
+import typing
+
+from PIL import Image
+
+from .af import AFFile
+from .bk import BKFile
+from .palette import Palette
+from .protos import encode_blob_base64, decode_blob
+from .sprite import Sprite
+from .utils import rle
+from .utils.exceptions import OMFInvalidDataException
+from .utils.json_backends import get_backend
+from .utils.png import IndexedPNG
+
+# Split directory layout for AF and BK sources:
+#
+#   header.json           everything but the moves/animations, which map to
+#   moves/<id>.json       one document per move (AF) or
+#   animations/<id>.json  animation (BK)
+#   sprites/<id>-<n>.png  sprite images as indexed PNGs, or as raw RLE data
+#   sprites/<id>-<n>.bin  with sprite_format="raw"
+#   background.png        BK background image (or background.bin)
+#
+# Images are referenced from the documents as {"encoding": "png" | "file",
+# "path": <relative path>}. Other byte arrays are stored inline as base64.
+#
+# PNG sprites are encoded again when the project is loaded, so the compiled
+# file has the same pixels but not necessarily the same image bytes as the
+# original. Use sprite_format="raw" for byte identical round trips.
+
+ProjectFile = typing.Union[AFFile, BKFile]
+ProjectType = typing.TypeVar("ProjectType", AFFile, BKFile)
+
+HEADER_FILE = "header.json"
+SPRITE_FORMATS = ("png", "raw")
+
+
+def _group_key(cls: type) -> str:
+    if issubclass(cls, AFFile):
+        return "moves"
+    if issubclass(cls, BKFile):
+        return "animations"
+    raise TypeError(f"{cls.__name__} has no project layout")
+
+
+def _grayscale() -> Palette:
+    palette = Palette()
+    palette.data = [(m, m, m) for m in range(256)]
+    return palette
+
+
+def _write_json(filename: str, data: dict) -> None:
+    backend = get_backend()
+    out = backend.dumps(data, encode_blob_base64, indent=backend.indent)
+    with open(filename, "wb") as handle:
+        handle.write(out.encode() if isinstance(out, str) else out)
+
+
+def _read_json(filename: str) -> dict:
+    with open(filename, "rb") as handle:
+        return get_backend().loads(handle.read(), decode_blob)
+
+
+def _write_file(filename: str, data: bytes) -> None:
+    with open(filename, "wb") as handle:
+        handle.write(data)
+
+
+def _save_sprite(
+    directory: str, name: str, sprite: Sprite, sprite_format: str, palette: Palette
+) -> typing.Any:
+    # Returns the value for the "image" field of the sprite document
+    if sprite.missing or sprite.size == 0:
+        # Missing sprites borrow their image from another sprite; it is not
+        # written to the file, so it is not kept here either.
+        return b""
+    if sprite_format == "png" and sprite.width and sprite.height:
+        try:
+            data, transparent = rle.decode_indexed(
+                sprite.image, sprite.width, sprite.height
+            )
+        except OMFInvalidDataException:
+            transparent = None
+        # Images that use every palette index have no spare transparent index.
+        # These, empty frames and broken image data are all stored raw.
+        if transparent is not None:
+            path = f"sprites/{name}.png"
+            png = IndexedPNG(data, sprite.width, sprite.height, transparent)
+            _write_file(os.path.join(directory, path), png.with_palette(palette))
+            return {"encoding": "png", "path": path}
+    path = f"sprites/{name}.bin"
+    _write_file(os.path.join(directory, path), sprite.image)
+    return {"encoding": "file", "path": path}
+
+
+def save_project(
+    obj: ProjectFile,
+    directory: str,
+    sprite_format: str = "png",
+    palette: Palette | None = None,
+) -> None:
+    # PNG sprites get the given palette, or the first BK palette, or a
+    # grayscale ramp. Only the pixel indexes are read back.
+    if sprite_format not in SPRITE_FORMATS:
+        raise ValueError(f"Unknown sprite format {sprite_format!r}")
+    group_key = _group_key(type(obj))
+    if palette is None:
+        if isinstance(obj, BKFile) and obj.palettes:
+            palette = obj.palettes[0].colors
+        else:
+            palette = _grayscale()
+
+    os.makedirs(os.path.join(directory, group_key), exist_ok=True)
+    os.makedirs(os.path.join(directory, "sprites"), exist_ok=True)
+
+    header = obj.serialize()
+    group = header.pop(group_key)
+    header[group_key] = {}
+    for key, doc in group.items():
+        sprites = getattr(obj, group_key)[key].sprites
+        for idx, sprite in enumerate(sprites):
+            doc["sprites"][idx]["image"] = _save_sprite(
+                directory, f"{key}-{idx}", sprite, sprite_format, palette
+            )
+        path = f"{group_key}/{key}.json"
+        _write_json(os.path.join(directory, path), doc)
+        header[group_key][str(key)] = path
+
+    if isinstance(obj, BKFile) and len(obj.background_image):
+        if sprite_format == "png":
+            path = "background.png"
+            png = IndexedPNG(
+                bytes(obj.background_image),
+                obj.background_width,
+                obj.background_height,
+            )
+            _write_file(os.path.join(directory, path), png.with_palette(palette))
+            header["background_image"] = {"encoding": "png", "path": path}
+        else:
+            path = "background.bin"
+            _write_file(os.path.join(directory, path), bytes(obj.background_image))
+            header["background_image"] = {"encoding": "file", "path": path}
+
+    _write_json(os.path.join(directory, HEADER_FILE), header)
+
+
+def _resolve(directory: str, path: str) -> str:
+    # References must stay inside the project directory
+    if not isinstance(path, str) or os.path.isabs(path):
+        raise OMFInvalidDataException(f"Invalid project path {path!r}")
+    normalized = os.path.normpath(path)
+    if normalized.startswith(os.pardir):
+        raise OMFInvalidDataException(f"Invalid project path {path!r}")
+    return os.path.join(directory, normalized)
+
+
+def _load_pixels(directory: str, ref: dict) -> tuple[bytes, int | None, int, int]:
+    # Pixel indexes, transparent index and size of a paletted PNG
+    with Image.open(_resolve(directory, ref["path"])) as img:
+        if img.mode != "P":
+            raise OMFInvalidDataException(f"{ref['path']} is not a paletted image")
+        transparency = img.info.get("transparency")
+        if not isinstance(transparency, int):
+            transparency = None
+        return img.tobytes(), transparency, img.width, img.height
+
+
+def _load_blob(directory: str, ref: typing.Any) -> typing.Any:
+    if not isinstance(ref, dict) or ref.get("encoding") != "file":
+        return ref
+    with open(_resolve(directory, ref["path"]), "rb") as handle:
+        return handle.read()
+
+
+def _load_sprite_image(directory: str, doc: dict) -> typing.Any:
+    ref = doc["image"]
+    if not isinstance(ref, dict) or ref.get("encoding") != "png":
+        return _load_blob(directory, ref)
+    pixels, transparency, width, height = _load_pixels(directory, ref)
+    if (width, height) != (doc["width"], doc["height"]):
+        raise OMFInvalidDataException(
+            f"{ref['path']} is {width}x{height}, expected "
+            f"{doc['width']}x{doc['height']}"
+        )
+    if transparency is None:
+        transparency = Sprite.TRANSPARENCY_INDEX
+    return rle.encode(pixels, width, height, transparency)
+
+
+def _load_background(directory: str, header: dict) -> typing.Any:
+    ref = header.get("background_image")
+    if not isinstance(ref, dict) or ref.get("encoding") != "png":
+        return _load_blob(directory, ref)
+    pixels, _, width, height = _load_pixels(directory, ref)
+    if (width, height) != (header["background_width"], header["background_height"]):
+        raise OMFInvalidDataException(
+            f"{ref['path']} does not match the background size"
+        )
+    return pixels
+
+
+def load_project(
+    cls: typing.Type[ProjectType], directory: str, trusted: bool = False
+) -> ProjectType:
+    group_key = _group_key(cls)
+    header = _read_json(os.path.join(directory, HEADER_FILE))
+
+    group = {}
+    for key, path in header.get(group_key, {}).items():
+        doc = _read_json(_resolve(directory, path))
+        for sprite in doc.get("sprites", []):
+            sprite["image"] = _load_sprite_image(directory, sprite)
+        group[key] = doc
+    header[group_key] = group
+
+    if issubclass(cls, BKFile):
+        header["background_image"] = _load_background(directory, header)
+
+    return cls.from_document(header, trusted=trusted)
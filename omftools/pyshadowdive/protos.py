@@ -1,12 +1,16 @@
-import json
+import base64
+import binascii
+import mmap
 import typing
 from enum import Enum
 from abc import ABCMeta, abstractmethod
 import validx
 import validx.exc
 
-from .utils.parser import BinaryParser
+from .utils.parser import BinaryParser, BufferParser, BinaryWriter
 from .utils.exceptions import OMFInvalidDataException
+from .utils.json_backends import get_backend
+from .utils import cbor
 
 PropertyDict = list[
     typing.Tuple[
@@ -18,6 +22,40 @@ PropertyDict = list[
 
 EntrypointType = typing.TypeVar("EntrypointType", bound="Entrypoint")
 
+BLOB_TYPES = (bytes, bytearray, memoryview)
+
+# Files with these extensions are read and written as CBOR instead of JSON
+PACKED_EXTENSIONS = (".cbor",)
+
+
+def is_packed_filename(filename: str) -> bool:
+    return filename.lower().endswith(PACKED_EXTENSIONS)
+
+
+def encode_blob_list(value: typing.Any) -> list[int]:
+    if isinstance(value, BLOB_TYPES):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_blob_base64(value: typing.Any) -> dict:
+    if isinstance(value, BLOB_TYPES):
+        return {"encoding": "base64", "data": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def decode_blob(value: dict) -> typing.Any:
+    # Turns tagged blobs back into bytes; other objects are left as they are
+    if value.get("encoding") != "base64":
+        return value
+    data = value.get("data")
+    if len(value) != 2 or not isinstance(data, str):
+        raise OMFInvalidDataException("Invalid base64 data: malformed blob")
+    try:
+        return base64.b64decode(data, validate=True)
+    except binascii.Error as e:
+        raise OMFInvalidDataException(f"Invalid base64 data: {e}")
+
 
 class DataObject(metaclass=ABCMeta):
     __slots__ = ()
@@ -35,6 +73,10 @@ class DataObject(metaclass=ABCMeta):
     def serialize(self) -> dict:
         raise NotImplementedError()
 
+    def materialize(self) -> None:
+        # Copies out byte arrays that are still views into a mapped file
+        pass
+
     def get_selected_props(self, prop_names: list[str]) -> PropertyDict:
         content: PropertyDict = []
         for attr in prop_names:
@@ -47,6 +89,8 @@ class DataObject(metaclass=ABCMeta):
         content: PropertyDict = []
         for slots in [getattr(cls, "__slots__", []) for cls in type(self).__mro__]:
             for attr in slots:
+                if attr.startswith("_"):
+                    continue
                 var = getattr(self, attr)
                 if type(var) in [float, int, str] or issubclass(type(var), Enum):
                     dec_var = getattr(self, f"real_{attr}", None)
@@ -55,45 +99,178 @@ class DataObject(metaclass=ABCMeta):
 
 
 class Entrypoint(DataObject, metaclass=ABCMeta):
-    __slots__ = ()
+    # Objects loaded with load_mmap or open() keep the mapped file in _mapped
+    # until close() is called
+    __slots__ = ("_mapped",)
 
     schema: typing.ClassVar[validx.Validator] = validx.Dict()
+    _mapped: BufferParser | None
+
+    def __enter__(self: EntrypointType) -> EntrypointType:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # Reads in everything that is still deferred, then unmaps the file.
+        # The object stays usable afterwards.
+        parser = getattr(self, "_mapped", None)
+        if parser is None:
+            return
+        self.materialize()
+        self._mapped = None
+        parser.close()
 
     @classmethod
-    def load_native(cls: typing.Type[EntrypointType], filename: str) -> EntrypointType:
+    def load_native(
+        cls: typing.Type[EntrypointType], filename: str, **kwargs
+    ) -> EntrypointType:
         obj = cls()
-        with open(filename, "rb", buffering=8192) as handle:
-            obj.read(BinaryParser(handle))
+        with open(filename, "rb") as handle:
+            obj.read(BufferParser(handle.read()), **kwargs)
         return obj
 
+    @classmethod
+    def load_mmap(
+        cls: typing.Type[EntrypointType], filename: str, **kwargs
+    ) -> EntrypointType:
+        # Byte arrays of the loaded object stay as views into the mapped file,
+        # so the file must not be modified while the object is alive.
+        obj = cls()
+        obj._mapped = cls.map_file(filename)
+        obj.read(obj._mapped, **kwargs)
+        return obj
+
+    @staticmethod
+    def map_file(filename: str) -> BufferParser:
+        with open(filename, "rb") as handle:
+            try:
+                data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files can not be mapped
+                raise OMFInvalidDataException(f"{filename} is empty")
+        return BufferParser(data, zero_copy=True)
+
     def save_native(self, filename: str) -> None:
+        with open(filename, "wb") as handle:
+            self.dump_native(handle)
+
+    def dump_native(self, handle: typing.BinaryIO) -> None:
+        writer = BinaryWriter()
+        self.write(writer)
+        writer.write_to(handle)
+
+    def to_native(self) -> bytes:
+        writer = BinaryWriter()
+        self.write(writer)
+        return writer.getvalue()
+
+    @classmethod
+    def load_json(
+        cls: typing.Type[EntrypointType],
+        filename: str,
+        trusted: bool = False,
+        backend: str | None = None,
+    ) -> EntrypointType:
+        with open(filename, "rb", buffering=8192) as handle:
+            return cls.from_json(handle.read(), trusted=trusted, backend=backend)
+
+    def save_json(
+        self,
+        filename: str,
+        compact: bool = False,
+        backend: str | None = None,
+        **kwargs,
+    ) -> None:
+        data = self._dump_json(compact, backend, kwargs)
         with open(filename, "wb", buffering=8192) as handle:
-            self.write(BinaryParser(handle))
+            handle.write(data.encode() if isinstance(data, str) else data)
+
+    def to_json(
+        self, compact: bool = False, backend: str | None = None, **kwargs
+    ) -> str:
+        data = self._dump_json(compact, backend, kwargs)
+        return data if isinstance(data, str) else data.decode()
+
+    def _dump_json(
+        self, compact: bool, backend: str | None, kwargs: dict
+    ) -> str | bytes:
+        # Byte arrays are written as lists of ints, or with compact as base64
+        # strings tagged with their encoding (see decode_blob). Backend is a
+        # name from utils.json_backends; the default is picked there.
+        default = encode_blob_base64 if compact else encode_blob_list
+        return get_backend(backend).dumps(self.serialize(), default, **kwargs)
 
     @classmethod
-    def load_json(cls: typing.Type[EntrypointType], filename: str) -> EntrypointType:
-        obj = cls()
+    def from_json(
+        cls: typing.Type[EntrypointType],
+        data: str | bytes,
+        trusted: bool = False,
+        backend: str | None = None,
+    ) -> EntrypointType:
+        decoded_data = get_backend(backend).loads(data, decode_blob)
+        return cls.from_document(decoded_data, trusted=trusted)
+
+    @classmethod
+    def load_packed(
+        cls: typing.Type[EntrypointType], filename: str, trusted: bool = False
+    ) -> EntrypointType:
         with open(filename, "rb", buffering=8192) as handle:
-            obj.from_json(handle.read().decode())
-        return obj
+            return cls.from_packed(handle.read(), trusted=trusted)
 
-    def save_json(self, filename: str, **kwargs) -> None:
+    def save_packed(self, filename: str) -> None:
         with open(filename, "wb", buffering=8192) as handle:
-            handle.write(self.to_json(**kwargs).encode())
+            handle.write(self.to_packed())
 
-    def to_json(self, **kwargs) -> str:
-        return json.dumps(self.serialize(), **kwargs)
+    def to_packed(self) -> bytes:
+        # Same document as the JSON output, but as CBOR with the byte arrays
+        # stored as binary
+        return cbor.dumps(self.serialize())
 
     @classmethod
-    def from_json(cls: typing.Type[EntrypointType], data: str) -> EntrypointType:
-        obj = cls()
-        decoded_data = json.loads(data)
+    def from_packed(
+        cls: typing.Type[EntrypointType], data: bytes, trusted: bool = False
+    ) -> EntrypointType:
+        return cls.from_document(cbor.loads(data), trusted=trusted)
+
+    @classmethod
+    def load_document(
+        cls: typing.Type[EntrypointType], filename: str, **kwargs
+    ) -> EntrypointType:
+        # Packed or JSON, depending on the file extension
+        if is_packed_filename(filename):
+            return cls.load_packed(filename, **kwargs)
+        return cls.load_json(filename, **kwargs)
 
+    def save_document(self, filename: str, **kwargs) -> None:
+        # Packed or JSON, depending on the file extension. Keyword arguments
+        # only apply to JSON.
+        if is_packed_filename(filename):
+            self.save_packed(filename)
+        else:
+            self.save_json(filename, **kwargs)
+
+    @classmethod
+    def from_document(
+        cls: typing.Type[EntrypointType], decoded_data: dict, trusted: bool = False
+    ) -> EntrypointType:
+        # With trusted, byte arrays are not checked item by item. Meant for
+        # files written by our own decompilers.
+        obj = cls()
         try:
-            obj.schema(decoded_data)
+            # Validated data has the byte arrays already converted to bytes
+            # The validx stubs leave out the context argument of __call__
+            decoded_data = obj.schema(
+                decoded_data, {"trusted": trusted}  # type: ignore[call-arg]
+            )
         except validx.exc.ValidationError as e:
             e.sort()
             rows = [f"{c}: {m}" for c, m in validx.exc.format_error(e)]
             raise OMFInvalidDataException("\n".join(rows))
 
-        return obj.unserialize(decoded_data)
+        try:
+            return obj.unserialize(decoded_data)
+        except (ValueError, TypeError) as e:
+            # Unchecked byte arrays in trusted mode
+            raise OMFInvalidDataException(f"Invalid data: {e}")
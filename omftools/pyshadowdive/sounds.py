@@ -1,31 +1,37 @@
 from __future__ import annotations
+import typing
 
 from .protos import Entrypoint, DataObject
 from .utils.audio import save_wav
 from .utils.parser import BinaryParser
+from .utils.lazy import LazySequence
 
 
 class Sound(DataObject):
     __slots__ = ("data", "frequency")
 
     def __init__(self) -> None:
-        self.data: list[int] = []
+        self.data: bytes | memoryview = b""
         self.frequency: int = 0
 
+    def materialize(self) -> None:
+        if not isinstance(self.data, bytes):
+            self.data = bytes(self.data)
+
     def serialize(self) -> dict:
         return {
             "frequency": self.frequency,
-            "data": self.data,
+            "data": bytes(self.data),
         }
 
     def read(self, parser: BinaryParser) -> Sound:
         length = parser.get_uint16()
         if length > 0:
             self.frequency = parser.get_uint8()
-            self.data = [parser.get_uint8() for _ in range(length)]
+            self.data = parser.get_uint8_array(length)
         else:
             self.frequency = 0
-            self.data = []
+            self.data = b""
 
         return self
 
@@ -45,14 +51,21 @@ class SoundFile(Entrypoint):
     __slots__ = ("sounds",)
 
     def __init__(self) -> None:
-        self.sounds: list[Sound] = []
+        self.sounds: typing.Sequence[Sound] = []
+
+    def materialize(self) -> None:
+        # Loads every sound of a lazily opened file
+        self.sounds = list(self.sounds)
+        for sound in self.sounds:
+            sound.materialize()
 
     def serialize(self) -> dict:
         return {
             "sounds": [s.serialize() for s in self.sounds],
         }
 
-    def read(self, parser: BinaryParser) -> SoundFile:
+    @staticmethod
+    def read_offsets(parser: BinaryParser) -> list[int]:
         first = parser.get_uint32()
         assert first == 0
 
@@ -61,14 +74,36 @@ class SoundFile(Entrypoint):
         assert remainder == 0
         block_count = block_count - 2
 
-        # Skip offsets
-        offsets = [1200]
+        # Offsets of all sound blocks. First one starts right after the
+        # header, and the table ends with an extra end offset.
+        offsets = [header_size]
         for m in range(block_count):
             offsets.append(parser.get_uint32())
+        return offsets[:block_count]
 
-        self.sounds = []
-        for m in range(block_count):
-            assert parser.get_pos() == offsets[m]
-            self.sounds.append(Sound().read(parser))
+    def read(self, parser: BinaryParser) -> SoundFile:
+        offsets = self.read_offsets(parser)
+
+        sounds: list[Sound] = []
+        for offset in offsets:
+            assert parser.get_pos() == offset
+            sounds.append(Sound().read(parser))
+        self.sounds = sounds
 
         return self
+
+    @classmethod
+    def open(cls, filename: str, cache_size: int = 16) -> SoundFile:
+        # Reads only the offset table. Sounds are read when indexed, and their
+        # sample data stays a view into the mapped file.
+        parser = cls.map_file(filename)
+        offsets = cls.read_offsets(parser)
+
+        def load_sound(m: int) -> Sound:
+            parser.set_pos(offsets[m])
+            return Sound().read(parser)
+
+        obj = cls()
+        obj._mapped = parser
+        obj.sounds = LazySequence(len(offsets), load_sound, cache_size)
+        return obj
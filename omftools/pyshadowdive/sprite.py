@@ -1,16 +1,28 @@
 from __future__ import annotations
 
-from functools import cache
+import hashlib
+import struct
+import typing
 
-from validx import Dict, Bool, List
+from PIL import Image
+from validx import Dict, Bool
 
 from .protos import DataObject
 from .palette import Palette
 from .utils.parser import BinaryParser
-from .utils.validator import UInt16, Int16, UInt8
+from .utils.validator import UInt16, Int16, UInt8, UInt8Array
 from .utils.types import EncodedImage, RawImage
 from .utils.exceptions import OMFInvalidDataException
 from .utils.images import save_png, generate_png
+from .utils.png import IndexedPNG
+from .utils import rle
+from .utils.lazy import LRUCache
+
+# Image length, position, size, index and missing flag
+_HEADER = struct.Struct("<HhhHHBB")
+
+# Palette index statistics of recently scanned images, see Sprite.scan_image
+_scan_cache: LRUCache[tuple[bytes, int, int], rle.PaletteStats] = LRUCache(4096)
 
 
 class Sprite(DataObject):
@@ -23,7 +35,8 @@ class Sprite(DataObject):
         "height",
         "index",
         "missing",
-        "image",
+        "_image",
+        "_skipped",
     )
 
     schema = Dict(
@@ -34,7 +47,7 @@ class Sprite(DataObject):
             "height": UInt16,
             "index": UInt8,
             "missing": Bool(),
-            "image": List(UInt8, maxlen=65535),
+            "image": UInt8Array(maxlen=65535),
         }
     )
 
@@ -45,40 +58,66 @@ class Sprite(DataObject):
         self.missing: bool = False
         self.width: int = 0
         self.height: int = 0
-        self.image: EncodedImage = []
-
-    def read(self, parser: BinaryParser) -> Sprite:
-        image_len = parser.get_uint16()
-        self.pos_x = parser.get_int16()
-        self.pos_y = parser.get_int16()
-        self.width = parser.get_uint16()
-        self.height = parser.get_uint16()
-        self.index = parser.get_uint8()
-        self.missing = parser.get_boolean()
-
-        self.image = []
-        if image_len and not self.missing:
-            self.image = [parser.get_uint8() for _ in range(image_len)]
+        self._image: EncodedImage = b""
+        # Set when the image data was skipped over on read, so that the
+        # sprite can not be written back without it.
+        self._skipped: bool = False
 
-        return self
+    @property
+    def image(self) -> bytes:
+        # Image data may be a deferred view into the source buffer (see
+        # Entrypoint.load_mmap); it is copied out only when first accessed.
+        if not isinstance(self._image, bytes):
+            self._image = bytes(self._image)
+        return self._image
+
+    @image.setter
+    def image(self, value: EncodedImage) -> None:
+        self._image = value
+        self._skipped = False
 
-    @cache
-    def scan_image(self) -> tuple[int, int, list[int]]:
-        start_index: int = 255
-        end_index: int = 0
-        indexes: set[int] = set()
+    def link_image(self, other: Sprite) -> None:
+        # Share the image data of another sprite without materializing it
+        self._image = other._image
 
-        image = self.decode_image()
-        for index in image:
-            if index == self.TRANSPARENCY_INDEX:
-                continue
-            if index < start_index:
-                start_index = index
-            if index > end_index:
-                end_index = index
-            indexes.add(index)
+    def read(self, parser: BinaryParser, load_image: bool = True) -> Sprite:
+        (
+            image_len,
+            self.pos_x,
+            self.pos_y,
+            self.width,
+            self.height,
+            self.index,
+            missing,
+        ) = parser.get_struct(_HEADER)
+        self.missing = missing == 1
 
-        return start_index, end_index, sorted(indexes)
+        self._image = b""
+        self._skipped = False
+        if image_len and not self.missing:
+            if load_image:
+                self._image = parser.get_uint8_array(image_len)
+            else:
+                parser.skip(image_len)
+                self._skipped = True
+
+        return self
+
+    def scan_image(self) -> rle.PaletteStats:
+        if self.width == 0 or self.height == 0 or len(self._image) == 0:
+            return 255, 0, []
+        # Keyed by content, so identical sprites (such as the ones AF files
+        # mark as missing) share an entry, and edits to the image are seen.
+        key = (
+            hashlib.blake2b(self._image, digest_size=16).digest(),
+            self.width,
+            self.height,
+        )
+        stats = _scan_cache.get(key)
+        if stats is None:
+            stats = rle.palette_stats(self._image, self.width, self.height)
+            _scan_cache.put(key, stats)
+        return stats[0], stats[1], list(stats[2])
 
     @property
     def pal_start_index(self) -> int:
@@ -94,56 +133,90 @@ class Sprite(DataObject):
 
     @property
     def size(self) -> int:
-        return len(self.image)
+        return len(self._image)
 
     def decode_image(self) -> RawImage:
         if self.width == 0 or self.height == 0 or len(self.image) == 0:
             return []
+        return rle.decode(self.image, self.width, self.height, self.TRANSPARENCY_INDEX)
 
-        in_size = len(self.image)
-        out_size: int = self.width * self.height
-        out: RawImage = [self.TRANSPARENCY_INDEX for _ in range(out_size)]
-
-        x: int = 0
-        y: int = 0
-        i: int = 0
-        while i < in_size:
-            c: int = self.image[i] + (self.image[i + 1] << 8)
-            data, op = divmod(c, 4)
-            i += 2
-
-            if op == 0:
-                x = data
-            elif op == 2:
-                y = data
-            elif op == 1:
-                while data > 0:
-                    pos = (y * self.width) + x
-                    out[pos] = self.image[i]
-                    i += 1
-                    x += 1
-                    data -= 1
-                x = 0
-            elif op == 3:
-                if i != in_size:
-                    raise OMFInvalidDataException("Bad image data!")
-
-        return out
+    def decode_array(self) -> typing.Any:
+        # Flat NumPy array of the decoded image, or a list if NumPy is missing
+        if self.width == 0 or self.height == 0 or len(self.image) == 0:
+            return []
+        return rle.decode_array(
+            self.image, self.width, self.height, self.TRANSPARENCY_INDEX
+        )
 
-    def save_png(self, filename: str, palette: Palette) -> None:
-        dec_data = self.decode_image()
-        if not dec_data:
+    def encode_image(
+        self,
+        raw: typing.Any,
+        width: int,
+        height: int,
+        transparent: int = TRANSPARENCY_INDEX,
+    ) -> Sprite:
+        # Raw is a flat sequence (or NumPy array) of width * height pixels,
+        # where pixels equal to the transparent value are left out.
+        self._image = rle.encode(raw, width, height, transparent)
+        self._skipped = False
+        self.width = width
+        self.height = height
+        return self
+
+    def render(self, palette: Palette) -> Image.Image:
+        if self.width == 0 or self.height == 0 or len(self.image) == 0:
             raise OMFInvalidDataException(
                 "Decoded image data resulted in an image of size 0!"
             )
+        data, transparent = rle.decode_indexed(self.image, self.width, self.height)
+        img = generate_png(data, self.width, self.height, palette)
+        if transparent is None:
+            # Every palette index is in use, so fall back to an alpha channel
+            img = img.convert("RGBA")
+            mask = bytes(
+                0 if index == self.TRANSPARENCY_INDEX else 255
+                for index in self.decode_image()
+            )
+            img.putalpha(Image.frombytes("L", img.size, mask))
+        else:
+            img.info["transparency"] = transparent
+        return img
+
+    def save_png(self, filename: str, palette: Palette) -> None:
+        img = self.render(palette)
         save_png(
-            img=generate_png(dec_data, self.width, self.height, palette),
+            img=img,
             filename=filename,
-            transparency=self.TRANSPARENCY_INDEX,
+            transparency=img.info.get("transparency"),
         )
 
+    def save_png_variants(self, variants: typing.Mapping[str, Palette]) -> None:
+        # Writes the sprite once per filename -> palette item. The pixel data is
+        # decoded and compressed only once; see IndexedPNG.
+        if self.width == 0 or self.height == 0 or len(self.image) == 0:
+            raise OMFInvalidDataException(
+                "Decoded image data resulted in an image of size 0!"
+            )
+        data, transparent = rle.decode_indexed(self.image, self.width, self.height)
+        if transparent is None:
+            # Needs an alpha channel, so each variant is a separate image
+            for filename, palette in variants.items():
+                self.save_png(filename, palette)
+            return
+        png = IndexedPNG(data, self.width, self.height, transparent)
+        for filename, palette in variants.items():
+            with open(filename, "wb") as fd:
+                fd.write(png.with_palette(palette))
+
+    def check_loaded(self) -> None:
+        if self._skipped:
+            raise OMFInvalidDataException(
+                "Sprite image was not loaded, so the sprite can not be saved"
+            )
+
     def write(self, parser: BinaryParser) -> None:
-        image_len = len(self.image)
+        self.check_loaded()
+        image_len = len(self._image)
         parser.put_uint16(image_len if image_len and not self.missing else 0)
         parser.put_int16(self.pos_x)
         parser.put_int16(self.pos_y)
@@ -153,10 +226,14 @@ class Sprite(DataObject):
         parser.put_boolean(self.missing)
 
         if image_len and not self.missing:
-            for m in range(image_len):
-                parser.put_uint8(self.image[m])
+            parser.put_uint8_array(self._image)
+
+    def materialize(self) -> None:
+        if not isinstance(self._image, bytes):
+            self._image = bytes(self._image)
 
     def serialize(self) -> dict:
+        self.check_loaded()
         return {
             "pos_x": self.pos_x,
             "pos_y": self.pos_y,
@@ -174,9 +251,9 @@ class Sprite(DataObject):
         self.height = data["height"]
         self.index = data["index"]
         self.missing = data["missing"]
-        self.image = data["image"]
+        self.image = bytes(data["image"])
         return self
 
     @property
     def len(self) -> int:
-        return len(self.image)
+        return len(self._image)
@@ -6,11 +6,14 @@ from .sprite import Sprite
 from .palette import Palette
 from .pilot import Pilot
 from .utils.parser import BinaryParser
+from .utils.lazy import LazySequence
 
 
 class TournamentFile(Entrypoint):
     MAX_ENEMIES: typing.Final[int] = 256
     MAX_LOCALES: typing.Final[int] = 10
+    END_TEXT_PILOTS: typing.Final[int] = 11
+    OFFSET_TABLE_OFFSET: typing.Final[int] = 300
 
     __slots__ = (
         "bk_name",
@@ -39,11 +42,18 @@ class TournamentFile(Entrypoint):
         self.tournament_id: int = 0
         self.pic_filename: str = ""
         self.palette: Palette = Palette()
-        self.locale_logos: list[Sprite] = []
+        self.locale_logos: typing.Sequence[Sprite] = []
         self.locale_descriptions: list[str] = []
         self.locale_titles: list[str] = []
-        self.locale_end_texts: list[list[list[str]]] = []
-        self.pilots: list[Pilot] = []
+        self.locale_end_texts: typing.Sequence[list[list[str]]] = []
+        self.pilots: typing.Sequence[Pilot] = []
+
+    def materialize(self) -> None:
+        self.pilots = list(self.pilots)
+        self.locale_logos = list(self.locale_logos)
+        self.locale_end_texts = list(self.locale_end_texts)
+        for logo in self.locale_logos:
+            logo.materialize()
 
     def serialize(self) -> dict:
         return {
@@ -58,12 +68,12 @@ class TournamentFile(Entrypoint):
             "locale_logos": [logo.serialize() for logo in self.locale_logos],
             "locale_descriptions": self.locale_descriptions,
             "locale_titles": self.locale_titles,
-            "locale_end_texts": self.locale_end_texts,
+            "locale_end_texts": list(self.locale_end_texts),
             "palette": self.palette.serialize(),
             "pilots": [p.serialize() for p in self.pilots],
         }
 
-    def read(self, parser: BinaryParser) -> TournamentFile:
+    def read_header(self, parser: BinaryParser) -> tuple[int, int]:
         enemy_count = parser.get_uint16()
         unknown_b = parser.get_uint16()
         victory_text_offset = parser.get_uint32()
@@ -75,15 +85,43 @@ class TournamentFile(Entrypoint):
         self.registration_fee = parser.get_uint32()
         self.assumed_initial_value = parser.get_uint32()
         self.tournament_id = parser.get_uint32()
+        return enemy_count, victory_text_offset
+
+    def read_locale_texts(self, parser: BinaryParser) -> None:
+        # Tournament palette
+        self.palette = Palette().read_range(parser, 128, 40)
+
+        # Tournament PIC file name
+        self.pic_filename = parser.get_var_str(size_includes_zero=True)
+
+        # Locale texts
+        self.locale_titles = []
+        self.locale_descriptions = []
+        for m in range(self.MAX_LOCALES):
+            self.locale_titles.append(parser.get_var_str(size_includes_zero=True))
+            self.locale_descriptions.append(parser.get_var_str(size_includes_zero=True))
+
+    @classmethod
+    def read_end_texts(cls, parser: BinaryParser) -> list[list[str]]:
+        # End text pages for all pilots of a single locale
+        return [
+            [parser.get_var_str(size_includes_zero=True) for _ in range(10)]
+            for _ in range(cls.END_TEXT_PILOTS)
+        ]
+
+    def read(self, parser: BinaryParser) -> TournamentFile:
+        enemy_count, victory_text_offset = self.read_header(parser)
 
         # Enemy block offsets
-        parser.set_pos(300)
+        parser.set_pos(self.OFFSET_TABLE_OFFSET)
         offsets = [parser.get_uint32() for _ in range(enemy_count + 1)]
 
         # Enemy data
+        pilots: list[Pilot] = []
         for m in range(enemy_count):
             parser.set_pos(offsets[m])
-            self.pilots.append(Pilot().read(parser))
+            pilots.append(Pilot().read(parser))
+        self.pilots = pilots
 
         # Seek to locales
         parser.set_pos(offsets[enemy_count])
@@ -91,27 +129,71 @@ class TournamentFile(Entrypoint):
         # Load logo sprites
         self.locale_logos = [Sprite().read(parser) for _ in range(self.MAX_LOCALES)]
 
-        # Tournament palette
-        self.palette = Palette().read_range(parser, 128, 40)
-
-        # Tournament PIC file name
-        self.pic_filename = parser.get_var_str(size_includes_zero=True)
-
-        # Locale texts
-        for m in range(self.MAX_LOCALES):
-            self.locale_titles.append(parser.get_var_str(size_includes_zero=True))
-            self.locale_descriptions.append(parser.get_var_str(size_includes_zero=True))
+        self.read_locale_texts(parser)
 
         # Seek to victory texts
         parser.set_pos(victory_text_offset)
 
         # Get all end text pages for all pilots for all locales
-        for t in range(self.MAX_LOCALES):
-            pilots = []
-            for h in range(11):
-                pilots.append(
-                    [parser.get_var_str(size_includes_zero=True) for _ in range(10)]
-                )
-            self.locale_end_texts.append(pilots)
+        self.locale_end_texts = [
+            self.read_end_texts(parser) for _ in range(self.MAX_LOCALES)
+        ]
 
         return self
+
+    @classmethod
+    def open(cls, filename: str) -> TournamentFile:
+        # Header, palette and locale titles are read right away. Pilots, logos
+        # and end texts are decoded when first accessed.
+        parser = cls.map_file(filename)
+        obj = cls()
+        enemy_count, victory_text_offset = obj.read_header(parser)
+
+        parser.set_pos(cls.OFFSET_TABLE_OFFSET)
+        offsets = [parser.get_uint32() for _ in range(enemy_count + 1)]
+
+        # Walk over the logo sprite headers to find the locale texts
+        parser.set_pos(offsets[enemy_count])
+        logo_offsets: list[int] = []
+        for _ in range(cls.MAX_LOCALES):
+            logo_offsets.append(parser.get_pos())
+            Sprite().read(parser, load_image=False)
+
+        obj.read_locale_texts(parser)
+
+        def load_pilot(m: int) -> Pilot:
+            parser.set_pos(offsets[m])
+            return Pilot().read(parser)
+
+        def load_logo(m: int) -> Sprite:
+            parser.set_pos(logo_offsets[m])
+            return Sprite().read(parser)
+
+        def load_end_texts(m: int) -> list[list[str]]:
+            parser.set_pos(victory_text_offset)
+            for _ in range(m * cls.END_TEXT_PILOTS * 10):
+                parser.skip_var_str(size_includes_zero=True)
+            return cls.read_end_texts(parser)
+
+        obj._mapped = parser
+        obj.pilots = LazySequence(enemy_count, load_pilot, None)
+        obj.locale_logos = LazySequence(cls.MAX_LOCALES, load_logo, None)
+        obj.locale_end_texts = LazySequence(cls.MAX_LOCALES, load_end_texts, None)
+        return obj
+
+    @classmethod
+    def summary(cls, filename: str) -> dict[str, typing.Any]:
+        # Header fields and enemy count, without touching any pilot blocks
+        obj = cls()
+        with open(filename, "rb") as handle:
+            enemy_count, _ = obj.read_header(BinaryParser(handle))
+        return {
+            "bk_name": obj.bk_name,
+            "winnings_multiplier": obj.winnings_multiplier,
+            "unknown_a": obj.unknown_a,
+            "unknown_b": obj.unknown_b,
+            "registration_fee": obj.registration_fee,
+            "assumed_initial_value": obj.assumed_initial_value,
+            "tournament_id": obj.tournament_id,
+            "enemy_count": enemy_count,
+        }
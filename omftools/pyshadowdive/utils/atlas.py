@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import typing
+
+from PIL import Image
+
+from . import rle
+from .exceptions import OMFInvalidDataException
+from ..palette import Palette
+from ..sprite import Sprite
+
+# Page number, x and y of a packed rectangle
+Placement = tuple[int, int, int]
+
+
+class Shelf:
+    __slots__ = (
+        "y",
+        "height",
+        "used_width",
+    )
+
+    def __init__(self, y: int, height: int) -> None:
+        self.y = y
+        self.height = height
+        self.used_width: int = 0
+
+
+class Page:
+    __slots__ = (
+        "shelves",
+        "used_height",
+    )
+
+    def __init__(self) -> None:
+        self.shelves: list[Shelf] = []
+        self.used_height: int = 0
+
+    def place(
+        self, width: int, height: int, max_width: int, max_height: int
+    ) -> tuple[int, int] | None:
+        # First shelf that fits, or a new shelf at the bottom of the page.
+        # Rectangles larger than the page only go on an empty page.
+        if width > max_width or height > max_height:
+            if self.shelves:
+                return None
+        for shelf in self.shelves:
+            if height <= shelf.height and shelf.used_width + width <= max_width:
+                x = shelf.used_width
+                shelf.used_width += width
+                return x, shelf.y
+        if self.shelves and self.used_height + height > max_height:
+            return None
+        shelf = Shelf(self.used_height, height)
+        shelf.used_width = width
+        self.shelves.append(shelf)
+        self.used_height += height
+        return 0, shelf.y
+
+
+def pack_shelves(
+    sizes: list[tuple[int, int]], max_width: int, max_height: int
+) -> list[Placement]:
+    # First fit decreasing height shelf packing. Rectangles are placed tallest
+    # first, into the first shelf of the first page that has room. A rectangle
+    # larger than a page gets a page of its own.
+    pages: list[Page] = []
+    placements: list[Placement] = [(0, 0, 0)] * len(sizes)
+    order = sorted(range(len(sizes)), key=lambda m: (-sizes[m][1], -sizes[m][0]))
+    for m in order:
+        width, height = sizes[m]
+        for page_no, page in enumerate(pages):
+            pos = page.place(width, height, max_width, max_height)
+            if pos is not None:
+                break
+        else:
+            page_no = len(pages)
+            pages.append(Page())
+            pos = pages[page_no].place(width, height, max_width, max_height)
+            assert pos is not None
+        placements[m] = (page_no, pos[0], pos[1])
+    return placements
+
+
+class AtlasEntry:
+    __slots__ = (
+        "page",
+        "x",
+        "y",
+        "width",
+        "height",
+        "pos_x",
+        "pos_y",
+    )
+
+    def __init__(
+        self, page: int, x: int, y: int, width: int, height: int, pos_x: int, pos_y: int
+    ) -> None:
+        self.page = page
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.pos_x = pos_x
+        self.pos_y = pos_y
+
+    def serialize(self) -> dict:
+        return {
+            "page": self.page,
+            "x": self.x,
+            "y": self.y,
+            "width": self.width,
+            "height": self.height,
+            "pos_x": self.pos_x,
+            "pos_y": self.pos_y,
+        }
+
+
+class SpriteAtlas:
+    __slots__ = (
+        "pages",
+        "sprites",
+        "skipped",
+    )
+
+    def __init__(self) -> None:
+        self.pages: list[Image.Image] = []
+        # Animation or move number -> one entry per sprite, None for sprites
+        # without an image.
+        self.sprites: dict[int, list[AtlasEntry | None]] = {}
+        # Animation or move number and index of sprites with broken image data
+        self.skipped: list[tuple[int, int]] = []
+
+    def get(self, key: int, index: int) -> AtlasEntry | None:
+        return self.sprites[key][index]
+
+    @classmethod
+    def build(
+        cls,
+        groups: typing.Mapping[int, typing.Sequence[Sprite]],
+        palette: Palette,
+        max_size: int = 1024,
+        padding: int = 1,
+    ) -> SpriteAtlas:
+        # Sprites with broken image data get no entry, and are listed in
+        # skipped instead.
+        atlas = cls()
+
+        # Sprites with the same image data (such as the AF sprites that are
+        # marked as missing) are packed only once.
+        unique: dict[tuple[bytes, int, int], int] = {}
+        invalid: set[tuple[bytes, int, int]] = set()
+        images: list[Sprite] = []
+        slots: list[tuple[int, int, Sprite, int | None]] = []
+        for key, sprites in groups.items():
+            atlas.sprites[key] = [None] * len(sprites)
+            for idx, sprite in enumerate(sprites):
+                if sprite.width == 0 or sprite.height == 0 or sprite.size == 0:
+                    slots.append((key, idx, sprite, None))
+                    continue
+                digest = hashlib.blake2b(sprite.image, digest_size=16).digest()
+                image_key = (digest, sprite.width, sprite.height)
+                if image_key not in unique and image_key not in invalid:
+                    try:
+                        sprite.scan_image()
+                    except OMFInvalidDataException:
+                        invalid.add(image_key)
+                if image_key in invalid:
+                    atlas.skipped.append((key, idx))
+                    slots.append((key, idx, sprite, None))
+                    continue
+                if image_key not in unique:
+                    unique[image_key] = len(images)
+                    images.append(sprite)
+                slots.append((key, idx, sprite, unique[image_key]))
+
+        placements = pack_shelves(
+            [(s.width + padding, s.height + padding) for s in images],
+            max_size,
+            max_size,
+        )
+        atlas.pages = cls._draw_pages(images, placements, palette)
+
+        for key, idx, sprite, image_no in slots:
+            if image_no is None:
+                continue
+            page, x, y = placements[image_no]
+            atlas.sprites[key][idx] = AtlasEntry(
+                page, x, y, sprite.width, sprite.height, sprite.pos_x, sprite.pos_y
+            )
+        return atlas
+
+    @staticmethod
+    def _draw_pages(
+        images: list[Sprite], placements: list[Placement], palette: Palette
+    ) -> list[Image.Image]:
+        page_count = max((p[0] for p in placements), default=-1) + 1
+        sizes = [[0, 0] for _ in range(page_count)]
+        used: list[set[int]] = [set() for _ in range(page_count)]
+        for sprite, (page, x, y) in zip(images, placements):
+            sizes[page][0] = max(sizes[page][0], x + sprite.width)
+            sizes[page][1] = max(sizes[page][1], y + sprite.height)
+            used[page].update(sprite.pal_indexes)
+
+        # Pages stay paletted if some palette index is unused by all of their
+        # sprites, and that index becomes the transparent one. Otherwise the
+        # page is drawn in RGBA.
+        pages: list[Image.Image] = []
+        fills: list[int | None] = []
+        for page_size, page_used in zip(sizes, used):
+            fill = rle.highest_unused(page_used)
+            if fill is None:
+                page_img = Image.new("RGBA", (page_size[0], page_size[1]))
+            else:
+                page_img = Image.new("P", (page_size[0], page_size[1]), color=fill)
+                page_img.putpalette(palette.as_bytes())
+                page_img.info["transparency"] = fill
+            pages.append(page_img)
+            fills.append(fill)
+
+        for sprite, (page, x, y) in zip(images, placements):
+            fill = fills[page]
+            if fill is None:
+                pages[page].alpha_composite(
+                    sprite.render(palette).convert("RGBA"), (x, y)
+                )
+            else:
+                data = rle.decode_bytes(sprite.image, sprite.width, sprite.height, fill)
+                img = Image.frombuffer(
+                    "P", (sprite.width, sprite.height), bytes(data), "raw", "P", 0, 1
+                )
+                pages[page].paste(img, (x, y))
+        return pages
+
+    def page_filename(self, basename: str, page: int) -> str:
+        return f"{basename}-atlas-{page}.png"
+
+    def serialize(self, basename: str) -> dict:
+        return {
+            "pages": [
+                {
+                    "file": self.page_filename(basename, m),
+                    "width": page.width,
+                    "height": page.height,
+                }
+                for m, page in enumerate(self.pages)
+            ],
+            "sprites": {
+                str(key): [e.serialize() if e else None for e in entries]
+                for key, entries in self.sprites.items()
+            },
+        }
+
+    def save(self, output_dir: str, basename: str) -> None:
+        # Writes <basename>-atlas-<page>.png for every page, and the manifest
+        # as <basename>-atlas.json
+        for m, page in enumerate(self.pages):
+            filename = os.path.join(output_dir, self.page_filename(basename, m))
+            with open(filename, "wb") as fd:
+                page.save(fd, "png", transparency=page.info.get("transparency"))
+        with open(os.path.join(output_dir, f"{basename}-atlas.json"), "w") as fd:
+            json.dump(self.serialize(basename), fd, indent=2)
@@ -0,0 +1,179 @@
+import struct
+import typing
+
+from .exceptions import OMFInvalidDataException
+
+# Minimal CBOR (RFC 8949) codec for serialized documents. Supports integers,
+# byte and text strings, arrays, maps, floats, booleans and null; tags and
+# indefinite length items are not supported. Map keys that are not strings
+# are written as strings, the same as JSON does, so documents pass the same
+# schemas.
+
+_UINT8 = struct.Struct(">B")
+_UINT16 = struct.Struct(">H")
+_UINT32 = struct.Struct(">I")
+_UINT64 = struct.Struct(">Q")
+_FLOAT16 = struct.Struct(">e")
+_FLOAT32 = struct.Struct(">f")
+_FLOAT64 = struct.Struct(">d")
+
+MAJOR_UINT = 0
+MAJOR_NEGINT = 1
+MAJOR_BYTES = 2
+MAJOR_TEXT = 3
+MAJOR_ARRAY = 4
+MAJOR_MAP = 5
+MAJOR_SIMPLE = 7
+
+# Deepest nesting of arrays and maps that is decoded. Documents are only a
+# few levels deep; the limit keeps broken input from exhausting the stack.
+MAX_DEPTH = 64
+
+
+def _head(out: bytearray, major: int, value: int) -> None:
+    major <<= 5
+    if value < 24:
+        out.append(major | value)
+    elif value < 0x100:
+        out.append(major | 24)
+        out += _UINT8.pack(value)
+    elif value < 0x10000:
+        out.append(major | 25)
+        out += _UINT16.pack(value)
+    elif value < 0x100000000:
+        out.append(major | 26)
+        out += _UINT32.pack(value)
+    elif value < 0x10000000000000000:
+        out.append(major | 27)
+        out += _UINT64.pack(value)
+    else:
+        raise OMFInvalidDataException(f"Integer {value} is too large for CBOR")
+
+
+def _encode(out: bytearray, value: typing.Any) -> None:
+    if isinstance(value, str):
+        data = value.encode()
+        _head(out, MAJOR_TEXT, len(data))
+        out += data
+    elif value is True:
+        out.append(0xF5)
+    elif value is False:
+        out.append(0xF4)
+    elif value is None:
+        out.append(0xF6)
+    elif isinstance(value, int):
+        if value >= 0:
+            _head(out, MAJOR_UINT, value)
+        else:
+            _head(out, MAJOR_NEGINT, -1 - value)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        _head(out, MAJOR_BYTES, len(value))
+        out += value
+    elif isinstance(value, (list, tuple)):
+        _head(out, MAJOR_ARRAY, len(value))
+        for item in value:
+            _encode(out, item)
+    elif isinstance(value, dict):
+        _head(out, MAJOR_MAP, len(value))
+        for key, item in value.items():
+            _encode(out, key if isinstance(key, str) else str(key))
+            _encode(out, item)
+    elif isinstance(value, float):
+        out.append(0xFB)
+        out += _FLOAT64.pack(value)
+    else:
+        raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def dumps(value: typing.Any) -> bytes:
+    out = bytearray()
+    _encode(out, value)
+    return bytes(out)
+
+
+class _Decoder:
+    __slots__ = (
+        "data",
+        "pos",
+    )
+
+    def __init__(self, data: bytes | memoryview) -> None:
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def _take(self, length: int) -> memoryview:
+        start = self.pos
+        end = start + length
+        if end > len(self.data):
+            raise OMFInvalidDataException("Truncated CBOR data")
+        self.pos = end
+        return self.data[start:end]
+
+    def _argument(self, info: int) -> int:
+        if info < 24:
+            return info
+        if info == 24:
+            return self._take(1)[0]
+        if info == 25:
+            return _UINT16.unpack(self._take(2))[0]
+        if info == 26:
+            return _UINT32.unpack(self._take(4))[0]
+        if info == 27:
+            return _UINT64.unpack(self._take(8))[0]
+        raise OMFInvalidDataException("Indefinite length CBOR items are not supported")
+
+    def decode(self, depth: int = 0) -> typing.Any:
+        initial = self._take(1)[0]
+        major = initial >> 5
+        info = initial & 0x1F
+
+        if major == MAJOR_SIMPLE:
+            if info == 20:
+                return False
+            if info == 21:
+                return True
+            if info == 22:
+                return None
+            if info == 25:
+                return _FLOAT16.unpack(self._take(2))[0]
+            if info == 26:
+                return _FLOAT32.unpack(self._take(4))[0]
+            if info == 27:
+                return _FLOAT64.unpack(self._take(8))[0]
+            raise OMFInvalidDataException(f"Unsupported CBOR simple value {info}")
+
+        arg = self._argument(info)
+        if major == MAJOR_UINT:
+            return arg
+        if major == MAJOR_NEGINT:
+            return -1 - arg
+        if major == MAJOR_BYTES:
+            return bytes(self._take(arg))
+        if major == MAJOR_TEXT:
+            try:
+                return str(self._take(arg), "utf-8")
+            except UnicodeDecodeError:
+                raise OMFInvalidDataException("Invalid UTF-8 in CBOR text")
+        if major in (MAJOR_ARRAY, MAJOR_MAP) and depth >= MAX_DEPTH:
+            raise OMFInvalidDataException("CBOR data is nested too deeply")
+        if major == MAJOR_ARRAY:
+            return [self.decode(depth + 1) for _ in range(arg)]
+        if major == MAJOR_MAP:
+            result = {}
+            for _ in range(arg):
+                key = self.decode(depth + 1)
+                if not isinstance(key, (str, int)):
+                    raise OMFInvalidDataException(
+                        f"Unsupported CBOR map key of type {type(key).__name__}"
+                    )
+                result[key] = self.decode(depth + 1)
+            return result
+        raise OMFInvalidDataException("CBOR tags are not supported")
+
+
+def loads(data: bytes | memoryview) -> typing.Any:
+    decoder = _Decoder(data)
+    value = decoder.decode()
+    if decoder.pos != len(decoder.data):
+        raise OMFInvalidDataException("Trailing data after CBOR document")
+    return value
@@ -1,17 +1,19 @@
 from PIL import Image
-from typing import List
 
 from .types import RawImage
 from ..palette import Palette
 
 
-def generate_png(data: RawImage, w: int, h: int, palette: Palette) -> Image.Image:
-    n_pal: List[int] = []
-    for triplet in palette.data:
-        n_pal.extend(triplet)
-    img = Image.new("P", (w, h), color=0)
-    img.putdata(data)
-    img.putpalette(n_pal)
+def generate_png(
+    data: RawImage | bytes | bytearray | memoryview, w: int, h: int, palette: Palette
+) -> Image.Image:
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        # One byte per pixel; PIL can use the buffer as is
+        img = Image.frombuffer("P", (w, h), bytes(data), "raw", "P", 0, 1)
+    else:
+        img = Image.new("P", (w, h), color=0)
+        img.putdata(data)
+    img.putpalette(palette.as_bytes())
     return img
 
 
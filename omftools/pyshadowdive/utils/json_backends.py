@@ -0,0 +1,105 @@
+import json
+import os
+import types
+import typing
+
+orjson: types.ModuleType | None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Name of the backend to use when none is given, if set
+BACKEND_ENV = "OMFTOOLS_JSON_BACKEND"
+
+Hook = typing.Callable[[typing.Any], typing.Any]
+
+
+class JSONBackend:
+    # Backends produce and take their native document type (str or bytes), so
+    # that files can be written and read without extra copies. Indent is the
+    # one to use for readable output with this backend.
+    name: str = ""
+    indent: int = 4
+
+    def dumps(self, obj: typing.Any, default: Hook, **kwargs) -> str | bytes:
+        raise NotImplementedError()
+
+    def loads(self, data: str | bytes, object_hook: Hook) -> typing.Any:
+        raise NotImplementedError()
+
+
+class StdlibBackend(JSONBackend):
+    name = "json"
+
+    def dumps(self, obj: typing.Any, default: Hook, **kwargs) -> str | bytes:
+        return json.dumps(obj, default=default, **kwargs)
+
+    def loads(self, data: str | bytes, object_hook: Hook) -> typing.Any:
+        return json.loads(data, object_hook=object_hook)
+
+
+def _apply_hook(value: typing.Any, object_hook: Hook) -> typing.Any:
+    # Calls object_hook bottom up on every object, like json.loads does. Lists
+    # that do not start with a container hold only scalars (such as byte
+    # arrays in the default profile), and are skipped without a scan.
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, (dict, list)):
+                value[key] = _apply_hook(item, object_hook)
+        return object_hook(value)
+    if isinstance(value, list) and value and isinstance(value[0], (dict, list)):
+        for m, item in enumerate(value):
+            value[m] = _apply_hook(item, object_hook)
+    return value
+
+
+class OrjsonBackend(JSONBackend):
+    name = "orjson"
+    indent = 2
+
+    def __init__(self, module: types.ModuleType) -> None:
+        self.module = module
+        self.fallback = StdlibBackend()
+
+    def dumps(self, obj: typing.Any, default: Hook, **kwargs) -> str | bytes:
+        # Integer keys (move and animation numbers) are written as strings,
+        # like the stdlib does. orjson can only indent by two spaces; other
+        # indents and any other json.dumps options go to the stdlib instead.
+        indent = kwargs.get("indent")
+        if indent not in (None, 2) or set(kwargs) - {"indent"}:
+            return self.fallback.dumps(obj, default, **kwargs)
+        option = self.module.OPT_NON_STR_KEYS
+        if indent:
+            option |= self.module.OPT_INDENT_2
+        return self.module.dumps(obj, default=default, option=option)
+
+    def loads(self, data: str | bytes, object_hook: Hook) -> typing.Any:
+        return _apply_hook(self.module.loads(data), object_hook)
+
+
+_backends: dict[str, JSONBackend] = {}
+
+
+def register_backend(backend: JSONBackend) -> None:
+    _backends[backend.name] = backend
+
+
+def available_backends() -> list[str]:
+    return list(_backends)
+
+
+def get_backend(name: str | None = None) -> JSONBackend:
+    # Explicit name, then the environment variable, then the stdlib. Faster
+    # backends are only used when asked for, as their output may differ in
+    # formatting.
+    name = name or os.environ.get(BACKEND_ENV) or "json"
+    try:
+        return _backends[name]
+    except KeyError:
+        raise ValueError(f"Unknown or unavailable JSON backend {name!r}")
+
+
+register_backend(StdlibBackend())
+if orjson is not None:
+    register_backend(OrjsonBackend(orjson))
@@ -0,0 +1,82 @@
+import typing
+from collections import OrderedDict
+
+K = typing.TypeVar("K")
+V = typing.TypeVar("V")
+T = typing.TypeVar("T")
+
+
+class LRUCache(typing.Generic[K, V]):
+    # Mapping that keeps at most max_size most recently used items. With
+    # max_size None the cache is unbounded.
+    __slots__ = (
+        "items",
+        "max_size",
+    )
+
+    def __init__(self, max_size: int | None = 16) -> None:
+        self.items: OrderedDict[K, V] = OrderedDict()
+        self.max_size = max_size
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self.items
+
+    def get(self, key: K) -> V | None:
+        value = self.items.get(key)
+        if value is not None:
+            self.items.move_to_end(key)
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if self.max_size is not None and len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+
+    def clear(self) -> None:
+        self.items.clear()
+
+
+class LazySequence(typing.Sequence[T]):
+    # Read-only sequence whose items are produced by loader(index) on first
+    # access. Loaded items are kept in an LRU cache.
+    __slots__ = (
+        "length",
+        "loader",
+        "cache",
+    )
+
+    def __init__(
+        self,
+        length: int,
+        loader: typing.Callable[[int], T],
+        cache_size: int | None = 16,
+    ) -> None:
+        self.length = length
+        self.loader = loader
+        self.cache: LRUCache[int, T] = LRUCache(cache_size)
+
+    def __len__(self) -> int:
+        return self.length
+
+    @typing.overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @typing.overload
+    def __getitem__(self, index: slice) -> list[T]: ...
+
+    def __getitem__(self, index: int | slice) -> T | list[T]:
+        if isinstance(index, slice):
+            return [self[m] for m in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("LazySequence index out of range")
+        item = self.cache.get(index)
+        if item is None:
+            item = self.loader(index)
+            self.cache.put(index, item)
+        return item
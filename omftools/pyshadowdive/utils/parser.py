@@ -1,9 +1,32 @@
+import mmap
 import struct
+import typing
 from typing import BinaryIO, Optional
 import os
 
 from .exceptions import OMFInvalidDataException
 
+_INT8 = struct.Struct("<b")
+_UINT8 = struct.Struct("<B")
+_INT16 = struct.Struct("<h")
+_UINT16 = struct.Struct("<H")
+_INT32 = struct.Struct("<i")
+_UINT32 = struct.Struct("<I")
+_FLOAT = struct.Struct("<f")
+
+# One 256 byte keystream period for each possible starting XOR key
+_XOR_PERIODS = [bytes((key + m) & 0xFF for m in range(256)) for key in range(256)]
+
+
+def xor_stream(data: bytes, key: int) -> bytes:
+    # XOR data with the rolling key stream key, key + 1, ... (mod 256) in one go
+    length = len(data)
+    if length == 0:
+        return b""
+    stream = (_XOR_PERIODS[key] * (length // 256 + 1))[:length]
+    value = int.from_bytes(data, "little") ^ int.from_bytes(stream, "little")
+    return value.to_bytes(length, "little")
+
 
 class BinaryParser:
     __slots__ = (
@@ -22,16 +45,12 @@ class BinaryParser:
         self.set_pos(pos)
         return size
 
-    def xor_data(self, data: bytes) -> bytearray:
+    def xor_data(self, data: bytes) -> bytes:
         assert self.xor_key is not None
         assert 0 <= self.xor_key <= 255
-        c = bytearray(data)
-        for m in range(len(c)):
-            c[m] = self.xor_key ^ c[m]
-            self.xor_key += 1
-            if self.xor_key > 255:
-                self.xor_key = 0
-        return c
+        out = xor_stream(data, self.xor_key)
+        self.xor_key = (self.xor_key + len(out)) & 0xFF
+        return out
 
     def write(self, data: bytes) -> None:
         if self.xor_key is not None:
@@ -42,7 +61,7 @@ class BinaryParser:
     def read(self, size: int) -> bytes:
         data = self.handle.read(size)
         if self.xor_key is not None:
-            return bytes(self.xor_data(data))
+            return self.xor_data(data)
         else:
             return data
 
@@ -51,7 +70,10 @@ class BinaryParser:
         self.xor_key = key
 
     def skip(self, size: int) -> None:
-        self.read(size)
+        if self.xor_key is not None:
+            self.read(size)
+        else:
+            self.handle.seek(size, os.SEEK_CUR)
 
     def get_pos(self) -> int:
         return self.handle.tell()
@@ -75,16 +97,9 @@ class BinaryParser:
             raise OMFInvalidDataException(f"Got {got}, was expecting {compare_to}")
 
     def get_null_padded_str(self, max_length: int) -> str:
-        chars = bytearray()
-        ended = False
-        for k in range(max_length):
-            c = self.read(1)
-            if c[0] == 0:
-                ended = True
-            if ended:
-                continue
-            chars.append(c[0])
-        return chars.decode("cp437")
+        data = self.read(max_length)
+        end = data.find(0)
+        return (data[:end] if end >= 0 else data).decode("cp437")
 
     def get_str(self, length: int) -> str:
         return self.read(length).decode("cp437") if length > 0 else ""
@@ -92,26 +107,36 @@ class BinaryParser:
     def get_bytes(self, length: int) -> bytes:
         return self.read(length)
 
+    def _unpack(self, fmt: struct.Struct) -> typing.Any:
+        return fmt.unpack(self.read(fmt.size))[0]
+
+    def get_struct(self, fmt: struct.Struct) -> tuple[typing.Any, ...]:
+        # All fields of a fixed size record in one go
+        return fmt.unpack(self.read(fmt.size))
+
+    def get_uint8_array(self, length: int) -> typing.Union[bytes, memoryview]:
+        return self.read(length)
+
     def get_int8(self) -> int:
-        return struct.unpack("<b", self.read(1))[0]
+        return self._unpack(_INT8)
 
     def get_uint8(self) -> int:
-        return struct.unpack("<B", self.read(1))[0]
+        return self._unpack(_UINT8)
 
     def get_int16(self) -> int:
-        return struct.unpack("<h", self.read(2))[0]
+        return self._unpack(_INT16)
 
     def get_uint16(self) -> int:
-        return struct.unpack("<H", self.read(2))[0]
+        return self._unpack(_UINT16)
 
     def get_int32(self) -> int:
-        return struct.unpack("<i", self.read(4))[0]
+        return self._unpack(_INT32)
 
     def get_uint32(self) -> int:
-        return struct.unpack("<I", self.read(4))[0]
+        return self._unpack(_UINT32)
 
     def get_float(self) -> float:
-        return struct.unpack("<f", self.read(4))[0]
+        return self._unpack(_FLOAT)
 
     def get_boolean(self) -> bool:
         return self.get_uint8() == 1
@@ -124,6 +149,12 @@ class BinaryParser:
         self.check_uint8(0)
         return data
 
+    def skip_var_str(self, size_includes_zero: bool = False) -> None:
+        m_len = self.get_uint16()
+        if m_len == 0 and size_includes_zero:
+            return
+        self.skip(m_len if size_includes_zero else m_len + 1)
+
     def put_null_padded_str(self, data: str, max_length: int) -> None:
         buf = data.encode("cp437")[:max_length]
         left = max_length - len(buf)
@@ -132,8 +163,7 @@ class BinaryParser:
             self.write(b"\0")
 
     def put_padding(self, length: int) -> None:
-        for m in range(length):
-            self.put_uint8(0)
+        self.write(bytes(length))
 
     def put_str(self, data: str) -> None:
         self.write(data.encode("cp437"))
@@ -141,26 +171,41 @@ class BinaryParser:
     def put_bytes(self, data: bytes) -> None:
         self.write(data)
 
+    def put_uint8_array(self, data: typing.Iterable[int]) -> None:
+        self.write(bytes(data))
+
     def put_int8(self, data: int) -> None:
-        self.write(struct.pack("<b", data))
+        self.write(_INT8.pack(data))
 
     def put_uint8(self, data: int) -> None:
-        self.write(struct.pack("<B", data))
+        self.write(_UINT8.pack(data))
 
     def put_int16(self, data: int) -> None:
-        self.write(struct.pack("<h", data))
+        self.write(_INT16.pack(data))
 
     def put_uint16(self, data: int) -> None:
-        self.write(struct.pack("<H", data))
+        self.write(_UINT16.pack(data))
 
     def put_int32(self, data: int) -> None:
-        self.write(struct.pack("<i", data))
+        self.write(_INT32.pack(data))
 
     def put_uint32(self, data: int) -> None:
-        self.write(struct.pack("<I", data))
+        self.write(_UINT32.pack(data))
 
     def put_float(self, data: float) -> None:
-        self.write(struct.pack("<f", data))
+        self.write(_FLOAT.pack(data))
+
+    def reserve_uint32(self) -> int:
+        # Write a placeholder and return its position for patch_uint32()
+        pos = self.get_pos()
+        self.put_uint32(0)
+        return pos
+
+    def patch_uint32(self, pos: int, data: int) -> None:
+        current = self.get_pos()
+        self.set_pos(pos)
+        self.put_uint32(data)
+        self.set_pos(current)
 
     def put_boolean(self, data: bool) -> None:
         self.put_uint8(1 if data else 0)
@@ -174,3 +219,158 @@ class BinaryParser:
         self.put_uint16(m_len + (1 if size_includes_zero else 0))
         self.write(m_data)
         self.put_uint8(0)
+
+
+class BufferParser(BinaryParser):
+    # Read-only parser over an in-memory buffer. Decodes fields straight out of
+    # the buffer with struct.unpack_from instead of doing a read per field.
+    # With zero_copy, byte arrays are returned as memoryview slices of the
+    # buffer instead of copies.
+    __slots__ = (
+        "source",
+        "view",
+        "offset",
+        "zero_copy",
+    )
+
+    def __init__(
+        self,
+        data: typing.Union[bytes, bytearray, memoryview, mmap.mmap],
+        zero_copy: bool = False,
+    ) -> None:
+        # There is no stream behind the buffer
+        self.handle = typing.cast(BinaryIO, None)
+        self.xor_key: Optional[int] = None
+        self.source = data
+        self.view = memoryview(data).cast("B")
+        self.offset: int = 0
+        self.zero_copy = zero_copy
+
+    def __enter__(self) -> "BufferParser":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # Unmaps the source if it is a mapped file. Byte arrays returned with
+        # zero_copy must not be in use anymore.
+        self.view.release()
+        if isinstance(self.source, mmap.mmap):
+            try:
+                self.source.close()
+            except BufferError:
+                raise OMFInvalidDataException(
+                    "Mapped file is still in use by byte array views"
+                )
+
+    def get_file_size(self) -> int:
+        return len(self.view)
+
+    def write(self, data: bytes) -> None:
+        raise OMFInvalidDataException("BufferParser is read-only")
+
+    def read(self, size: int) -> bytes:
+        start = self.offset
+        self.offset = min(start + size, len(self.view))
+        data = self.view[start : self.offset].tobytes()
+        if self.xor_key is not None:
+            return self.xor_data(data)
+        else:
+            return data
+
+    def skip(self, size: int) -> None:
+        if self.xor_key is not None:
+            self.read(size)
+        else:
+            self.offset = min(self.offset + size, len(self.view))
+
+    def get_pos(self) -> int:
+        return self.offset
+
+    def set_pos(self, pos: int) -> None:
+        self.offset = pos
+
+    def get_uint8_array(self, length: int) -> typing.Union[bytes, memoryview]:
+        if not self.zero_copy or self.xor_key is not None:
+            return self.read(length)
+        start = self.offset
+        self.offset = min(start + length, len(self.view))
+        return self.view[start : self.offset]
+
+    def _unpack(self, fmt: struct.Struct) -> typing.Any:
+        if self.xor_key is not None:
+            return fmt.unpack(self.read(fmt.size))[0]
+        value = fmt.unpack_from(self.view, self.offset)[0]
+        self.offset += fmt.size
+        return value
+
+    def get_struct(self, fmt: struct.Struct) -> tuple[typing.Any, ...]:
+        if self.xor_key is not None:
+            return fmt.unpack(self.read(fmt.size))
+        values = fmt.unpack_from(self.view, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def get_uint8(self) -> int:
+        if self.xor_key is not None:
+            return super().get_uint8()
+        try:
+            value = self.view[self.offset]
+        except IndexError:
+            # Same error as the other getters give at the end of the buffer
+            raise struct.error("unpack_from requires a buffer of at least 1 byte")
+        self.offset += 1
+        return value
+
+
+class BinaryWriter(BinaryParser):
+    # Write-only parser that collects output into a growable buffer. Reserved
+    # offsets are patched in place, so the result never needs a seekable output.
+    __slots__ = (
+        "buffer",
+        "offset",
+    )
+
+    def __init__(self) -> None:
+        self.xor_key: Optional[int] = None
+        self.buffer = bytearray()
+        self.offset: int = 0
+
+    def get_file_size(self) -> int:
+        return len(self.buffer)
+
+    def read(self, size: int) -> bytes:
+        raise OMFInvalidDataException("BinaryWriter is write-only")
+
+    def write(self, data: bytes) -> None:
+        if self.xor_key is not None:
+            data = self.xor_data(data)
+        self._pad_to(self.offset)
+        end = self.offset + len(data)
+        self.buffer[self.offset : end] = data
+        self.offset = end
+
+    def _pad_to(self, pos: int) -> None:
+        # Positions past the end (after set_pos or skip) are filled with zeroes
+        if pos > len(self.buffer):
+            self.buffer.extend(bytes(pos - len(self.buffer)))
+
+    def skip(self, size: int) -> None:
+        self.offset += size
+        self._pad_to(self.offset)
+
+    def get_pos(self) -> int:
+        return self.offset
+
+    def set_pos(self, pos: int) -> None:
+        self.offset = pos
+
+    def patch_uint32(self, pos: int, data: int) -> None:
+        _UINT32.pack_into(self.buffer, pos, data)
+
+    def getvalue(self) -> bytes:
+        return bytes(self.buffer)
+
+    def write_to(self, handle: BinaryIO) -> None:
+        handle.write(self.buffer)
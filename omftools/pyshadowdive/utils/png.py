@@ -0,0 +1,57 @@
+import struct
+import zlib
+
+from ..palette import Palette
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_LENGTH = struct.Struct(">I")
+_IHDR = struct.Struct(">IIBBBBB")
+
+
+def png_chunk(tag: bytes, data: bytes) -> bytes:
+    return (
+        _LENGTH.pack(len(data))
+        + tag
+        + data
+        + _LENGTH.pack(zlib.crc32(data, zlib.crc32(tag)))
+    )
+
+
+def palette_chunk(palette: Palette) -> bytes:
+    return png_chunk(b"PLTE", palette.as_bytes())
+
+
+class IndexedPNG:
+    # 8-bit paletted PNG whose pixel data is compressed once. Every palette
+    # variant is then made by writing a different PLTE chunk around the same
+    # IHDR, tRNS and IDAT chunks.
+    __slots__ = (
+        "head",
+        "tail",
+    )
+
+    def __init__(
+        self,
+        data: bytes | bytearray,
+        width: int,
+        height: int,
+        transparency: int | None = None,
+        compress_level: int = 6,
+    ) -> None:
+        # Each row is prefixed with filter type 0 (none)
+        rows = b"".join(
+            b"\x00" + data[y * width : (y + 1) * width] for y in range(height)
+        )
+        ihdr = _IHDR.pack(width, height, 8, 3, 0, 0, 0)
+        self.head = PNG_SIGNATURE + png_chunk(b"IHDR", ihdr)
+        tail = b""
+        if transparency is not None:
+            # Entries past the end of tRNS are opaque
+            trns = b"\xff" * transparency + b"\x00"
+            tail += png_chunk(b"tRNS", trns)
+        tail += png_chunk(b"IDAT", zlib.compress(rows, compress_level))
+        tail += png_chunk(b"IEND", b"")
+        self.tail = tail
+
+    def with_palette(self, palette: Palette) -> bytes:
+        return self.head + palette_chunk(palette) + self.tail
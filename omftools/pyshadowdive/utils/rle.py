@@ -0,0 +1,225 @@
+import re
+import struct
+import types
+import typing
+
+from .exceptions import OMFInvalidDataException
+from .types import EncodedImage, RawImage
+
+numpy: types.ModuleType | None
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Row, column, start of the pixel data in the encoded image and run length
+Span = tuple[int, int, int, int]
+
+# Lowest, highest and all used palette indexes of an image
+PaletteStats = tuple[int, int, list[int]]
+
+
+def scan_spans(image: EncodedImage) -> list[Span]:
+    # Walk the opcode stream only. Each opcode is an uint16 where the low two
+    # bits are the operation (0 = set x, 1 = pixel run, 2 = set y, 3 = end).
+    spans: list[Span] = []
+    in_size = len(image)
+    x: int = 0
+    y: int = 0
+    i: int = 0
+    while i < in_size:
+        c: int = image[i] + (image[i + 1] << 8)
+        data = c >> 2
+        op = c & 3
+        i += 2
+
+        if op == 0:
+            x = data
+        elif op == 2:
+            y = data
+        elif op == 1:
+            if i + data > in_size:
+                raise OMFInvalidDataException("Bad image data!")
+            spans.append((y, x, i, data))
+            i += data
+            x = 0
+        elif op == 3:
+            if i != in_size:
+                raise OMFInvalidDataException("Bad image data!")
+
+    return spans
+
+
+def _check_span(pos: int, length: int, out_size: int) -> None:
+    if pos + length > out_size:
+        raise OMFInvalidDataException("Bad image data!")
+
+
+def decode(image: EncodedImage, width: int, height: int, fill: int) -> RawImage:
+    out_size = width * height
+    out: RawImage = [fill] * out_size
+    for row, col, start, length in scan_spans(image):
+        pos = row * width + col
+        _check_span(pos, length, out_size)
+        out[pos : pos + length] = image[start : start + length]
+    return out
+
+
+def decode_array(image: EncodedImage, width: int, height: int, fill: int) -> typing.Any:
+    # Same as decode(), but fills a flat NumPy array. Falls back to decode()
+    # if NumPy is not available.
+    if numpy is None:
+        return decode(image, width, height, fill)
+
+    out_size = width * height
+    dtype = numpy.uint8 if fill <= 255 else numpy.uint16
+    out = numpy.full(out_size, fill, dtype=dtype)
+    src = numpy.frombuffer(image, dtype=numpy.uint8)
+    for row, col, start, length in scan_spans(image):
+        pos = row * width + col
+        _check_span(pos, length, out_size)
+        out[pos : pos + length] = src[start : start + length]
+    return out
+
+
+def palette_stats(image: EncodedImage, width: int, height: int) -> PaletteStats:
+    # Read from the pixel runs without decoding the frame. Empty images give
+    # (255, 0, []).
+    out_size = width * height
+    chunks = []
+    for row, col, start, length in scan_spans(image):
+        _check_span(row * width + col, length, out_size)
+        chunks.append(image[start : start + length])
+    used = set(b"".join(chunks))
+    if not used:
+        return 255, 0, []
+    return min(used), max(used), sorted(used)
+
+
+def highest_unused(used: set[int]) -> typing.Optional[int]:
+    return next((i for i in range(255, -1, -1) if i not in used), None)
+
+
+def _fill_bytes(
+    image: EncodedImage, spans: list[Span], width: int, height: int, fill: int
+) -> bytearray:
+    out_size = width * height
+    out = bytearray([fill]) * out_size
+    for row, col, start, length in spans:
+        pos = row * width + col
+        _check_span(pos, length, out_size)
+        out[pos : pos + length] = image[start : start + length]
+    return out
+
+
+def decode_indexed(
+    image: EncodedImage, width: int, height: int
+) -> tuple[bytearray, typing.Optional[int]]:
+    # Decodes into one byte per pixel, using the highest palette index that
+    # the image itself does not use for the transparent pixels. Returns that
+    # index, or None if the image uses all 256 (in which case transparent
+    # pixels are left as 0).
+    spans = scan_spans(image)
+    # Bytes that appear nowhere in the encoded data cannot be pixels either,
+    # which avoids collecting the pixel data for nearly every image.
+    transparent = highest_unused(set(image))
+    if transparent is None:
+        pixels = b"".join(
+            image[start : start + length] for _, _, start, length in spans
+        )
+        transparent = highest_unused(set(pixels))
+    return _fill_bytes(image, spans, width, height, transparent or 0), transparent
+
+
+def decode_bytes(image: EncodedImage, width: int, height: int, fill: int) -> bytearray:
+    # One byte per pixel, with transparent pixels set to fill (0 - 255)
+    return _fill_bytes(image, scan_spans(image), width, height, fill)
+
+
+# Largest value that fits in the 14 data bits of an opcode
+MAX_OPCODE_DATA = 0x3FFF
+
+# Row, column and length of a run of opaque pixels
+Run = tuple[int, int, int]
+
+_OPCODE = struct.Struct("<H")
+_RUN = struct.Struct("<HH")
+
+_OPAQUE_RUN = re.compile(rb"\x01+")
+
+
+def _find_runs_list(
+    raw: typing.Sequence[int], width: int, height: int, transparent: int
+) -> tuple[list[Run], bytes]:
+    mask = bytes(v != transparent for v in raw)
+    try:
+        pixels = bytes(0 if v == transparent else v for v in raw)
+    except ValueError:
+        raise OMFInvalidDataException("Pixel value out of range!")
+    runs: list[Run] = []
+    for row in range(height):
+        start = row * width
+        for m in _OPAQUE_RUN.finditer(mask, start, start + width):
+            runs.append((row, m.start() - start, m.end() - m.start()))
+    return runs, pixels
+
+
+def _find_runs_array(
+    raw: typing.Any, width: int, height: int, transparent: int
+) -> tuple[list[Run], bytes]:
+    # Only called by find_runs() when NumPy is installed
+    assert numpy is not None
+    if isinstance(raw, numpy.ndarray):
+        data = raw.reshape(height, width)
+    elif isinstance(raw, (bytes, bytearray, memoryview)):
+        data = numpy.frombuffer(raw, dtype=numpy.uint8).reshape(height, width)
+    else:
+        data = numpy.fromiter(raw, dtype=numpy.int32, count=width * height)
+        data = data.reshape(height, width)
+    mask = data != transparent
+    opaque = data[mask]
+    if opaque.size and (opaque.min() < 0 or opaque.max() > 255):
+        raise OMFInvalidDataException("Pixel value out of range!")
+
+    # Pad each row with a transparent column so that runs never continue over
+    # a row boundary; run edges are then the nonzero points of the difference.
+    padded = numpy.zeros((height, width + 1), dtype=numpy.int8)
+    padded[:, :width] = mask
+    edges = numpy.diff(padded.ravel(), prepend=0)
+    starts = numpy.flatnonzero(edges == 1)
+    ends = numpy.flatnonzero(edges == -1)
+    rows, cols = numpy.divmod(starts, width + 1)
+    runs = list(zip(rows.tolist(), cols.tolist(), (ends - starts).tolist()))
+    pixels = numpy.where(mask, data, 0).astype(numpy.uint8).tobytes()
+    return runs, pixels
+
+
+def find_runs(
+    raw: typing.Any, width: int, height: int, transparent: int
+) -> tuple[list[Run], bytes]:
+    # Returns the opaque runs in row order, and the pixels as bytes (with the
+    # transparent pixels zeroed) for slicing the run data out of.
+    if len(raw) != width * height:
+        raise OMFInvalidDataException("Image size does not match dimensions!")
+    if numpy is not None:
+        return _find_runs_array(raw, width, height, transparent)
+    return _find_runs_list(raw, width, height, transparent)
+
+
+def encode(raw: typing.Any, width: int, height: int, transparent: int) -> bytes:
+    # Rows, columns and run lengths must all fit in the 14 opcode data bits
+    if width > MAX_OPCODE_DATA or height > MAX_OPCODE_DATA + 1:
+        raise OMFInvalidDataException("Image too large to encode!")
+    runs, pixels = find_runs(raw, width, height, transparent)
+    out = bytearray()
+    last_row = -1
+    for row, col, length in runs:
+        if row != last_row:
+            out += _OPCODE.pack((row << 2) | 2)
+            last_row = row
+        pos = row * width + col
+        # The decoder resets x after every run, so each run gets its own x
+        out += _RUN.pack(col << 2, (length << 2) | 1)
+        out += pixels[pos : pos + length]
+    out += _OPCODE.pack(3)
+    return bytes(out)
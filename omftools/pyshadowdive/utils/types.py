@@ -1,9 +1,9 @@
 import typing
 
 Color = typing.Tuple[int, int, int]
-Remapping = list[int]
+Remapping = typing.Union[bytes, memoryview]
 Remappings = list[Remapping]
-EncodedImage = list[int]
+EncodedImage = typing.Union[bytes, memoryview]
 RawImage = list[int]
 HitCoordinate = typing.Dict[str, int]
 TransparencyMask = list[int]
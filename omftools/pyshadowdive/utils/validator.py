@@ -1,4 +1,4 @@
-from validx import Int
+from validx import Int, List, Validator, exc
 
 Int8 = Int(min=-128, max=127)
 UInt8 = Int(min=0, max=255)
@@ -6,3 +6,57 @@ Int16 = Int(min=-32766, max=32766)
 UInt16 = Int(min=0, max=65535)
 Int32 = Int(min=-2147483648, max=2147483647)
 UInt32 = Int(min=0, max=4294967296)
+
+
+class UInt8Array(Validator):
+    # Byte array field, stored in JSON either as a list of ints or as a tagged
+    # base64 string (decoded to bytes before validation). Values are returned
+    # as bytes. Lists are checked with a single bytes() conversion and a scan
+    # of the item types; only if those fail is the list validated item by
+    # item, for a precise error.
+    # With {"trusted": True} as the context, lists are passed through as is
+    # after the length checks.
+    __slots__ = ("minlen", "maxlen")
+
+    def __init__(
+        self,
+        minlen: int | None = None,
+        maxlen: int | None = None,
+        alias: str | None = None,
+        replace: bool = False,
+    ) -> None:
+        setattr = object.__setattr__
+        setattr(self, "minlen", minlen)
+        setattr(self, "maxlen", maxlen)
+        super().__init__(alias=alias, replace=replace)
+
+    def __call__(self, value, __context=None):
+        if isinstance(value, list):
+            trusted = __context is not None and __context.get("trusted")
+            if not trusted:
+                items = value
+                try:
+                    value = bytes(items)
+                except (ValueError, TypeError):
+                    # Precise errors for values out of range or of other types
+                    List(UInt8)(items)
+                # bytes() takes bools, and validx takes floats with an integer
+                # value; neither are byte values.
+                if set(map(type, items)) - {int}:
+                    raise exc.SchemaError(
+                        [
+                            exc.InvalidTypeError(
+                                expected=int, actual=type(v)
+                            ).add_context(m)
+                            for m, v in enumerate(items)
+                            if type(v) is not int
+                        ]
+                    )
+        elif not isinstance(value, bytes):
+            raise exc.InvalidTypeError(expected=bytes, actual=type(value))
+        length = len(value)
+        if self.minlen is not None and length < self.minlen:
+            raise exc.MinLengthError(expected=self.minlen, actual=length)
+        if self.maxlen is not None and length > self.maxlen:
+            raise exc.MaxLengthError(expected=self.maxlen, actual=length)
+        return value
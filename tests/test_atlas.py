@@ -0,0 +1,151 @@
+import json
+import random
+
+import pytest
+from PIL import Image
+
+from omftools.cli.generate_html import Filenames, generate_af, generate_bk
+from omftools.pyshadowdive.altpals import AltPaletteFile
+from omftools.pyshadowdive.sprite import Sprite
+from omftools.pyshadowdive.utils.atlas import SpriteAtlas, pack_shelves
+
+from .test_formats import make_af, make_bk
+from .test_images import make_palette
+from .test_rle import random_raw
+
+
+def overlaps(a, b) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_pack_shelves(seed):
+    rng = random.Random(seed)
+    sizes = [(rng.randrange(1, 120), rng.randrange(1, 120)) for _ in range(200)]
+    sizes.append((300, 20))
+    placements = pack_shelves(sizes, 256, 256)
+
+    rects: dict[int, list] = {}
+    for (w, h), (page, x, y) in zip(sizes, placements):
+        rect = (x, y, x + w, y + h)
+        if w <= 256:
+            assert rect[2] <= 256 and rect[3] <= 256
+        assert not any(overlaps(rect, other) for other in rects.get(page, []))
+        rects.setdefault(page, []).append(rect)
+
+
+def sprite_rgba(img: Image.Image) -> list:
+    data = img.convert("RGBA").tobytes()
+    pixels = [tuple(data[m : m + 4]) for m in range(0, len(data), 4)]
+    return [p if p[3] else (0, 0, 0, 0) for p in pixels]
+
+
+@pytest.mark.parametrize("max_size", [64, 1024])
+def test_atlas_pages_match_sprites(max_size):
+    palette = make_palette()
+    groups = {}
+    for key in range(4):
+        groups[key] = []
+        for seed in range(5):
+            raw, width, height = random_raw(key * 5 + seed)
+            sprite = Sprite().encode_image(raw, width, height)
+            sprite.pos_x, sprite.pos_y = seed, -key
+            groups[key].append(sprite)
+    groups[4] = [Sprite()]
+
+    atlas = SpriteAtlas.build(groups, palette, max_size=max_size)
+    assert atlas.get(4, 0) is None
+    if max_size == 64:
+        assert len(atlas.pages) > 1
+    for key, sprites in groups.items():
+        for idx, sprite in enumerate(sprites):
+            entry = atlas.get(key, idx)
+            if entry is None:
+                continue
+            assert (entry.pos_x, entry.pos_y) == (sprite.pos_x, sprite.pos_y)
+            page = atlas.pages[entry.page]
+            crop = page.crop(
+                (entry.x, entry.y, entry.x + entry.width, entry.y + entry.height)
+            )
+            assert sprite_rgba(crop) == sprite_rgba(sprite.render(palette))
+
+
+def test_atlas_shares_identical_sprites():
+    af = make_af()
+    atlas = SpriteAtlas.build(
+        {key: move.sprites for key, move in af.moves.items()}, make_palette()
+    )
+    entries = [atlas.get(key, idx) for key in af.moves for idx in range(3)]
+    assert len({(e.page, e.x, e.y) for e in entries}) == 1
+    assert [e.pos_y for e in entries] == [
+        s.pos_y for move in af.moves.values() for s in move.sprites
+    ]
+
+
+def test_atlas_skips_bad_sprites(capsys):
+    af = make_af()
+    # Pixel run past the end of the 3x2 frame
+    af.moves[5].sprites[1].image = bytes([29, 0] + [9] * 7 + [3, 0])
+    atlas = SpriteAtlas.build(
+        {key: move.sprites for key, move in af.moves.items()}, make_palette()
+    )
+    assert atlas.skipped == [(5, 1)]
+    assert atlas.get(5, 1) is None
+    assert atlas.get(5, 0) is not None
+    assert atlas.get(60, 2) is not None
+    assert capsys.readouterr().out == ""
+
+
+def test_atlas_all_indexes_used():
+    raw = list(range(256)) + [Sprite.TRANSPARENCY_INDEX]
+    sprite = Sprite().encode_image(raw, 257, 1)
+    atlas = SpriteAtlas.build({0: [sprite]}, make_palette())
+    assert atlas.pages[0].mode == "RGBA"
+    assert sprite_rgba(atlas.pages[0]) == sprite_rgba(sprite.render(make_palette()))
+
+
+def test_generate_html_atlas(tmp_path):
+    af_file = str(tmp_path / "FIGHTR0.AF")
+    bk_file = str(tmp_path / "ARENA0.BK")
+    make_af().save_native(af_file)
+    make_bk().save_native(bk_file)
+    alt_pals = AltPaletteFile()
+    alt_pals.palettes = [make_palette()]
+    files = Filenames(["FIGHTR0.AF"], ["ARENA0.BK"], [], [], "", "", "", "")
+    out = tmp_path / "out"
+    out.mkdir()
+
+    generate_af(af_file, files, str(out), alt_pals, atlas=True)
+    generate_bk(bk_file, files, str(out), atlas=True)
+
+    for name in ("FIGHTR0.AF", "ARENA0.BK"):
+        manifest = json.loads((out / f"{name}-atlas.json").read_text())
+        assert manifest["pages"][0]["file"] == f"{name}-atlas-0.png"
+        assert (out / f"{name}-atlas-0.png").exists()
+        html = (out / f"{name}.html").read_text()
+        assert f"url('{name}-atlas-0.png')" in html
+    manifest = json.loads((out / "FIGHTR0.AF-atlas.json").read_text())
+    assert manifest["sprites"]["5"][1] == {
+        "page": 0,
+        "x": 0,
+        "y": 0,
+        "width": 3,
+        "height": 2,
+        "pos_x": -6,
+        "pos_y": 6,
+    }
+    assert not list(out.glob("FIGHTR0.AF-1-*.png"))
+
+
+def test_generate_html_atlas_skips_bad_sprites(tmp_path, capsys):
+    af = make_af()
+    af.moves[5].sprites[1].image = bytes([29, 0] + [9] * 7 + [3, 0])
+    af_file = str(tmp_path / "FIGHTR0.AF")
+    af.save_native(af_file)
+    alt_pals = AltPaletteFile()
+    alt_pals.palettes = [make_palette()]
+    files = Filenames(["FIGHTR0.AF"], [], [], [], "", "", "", "")
+
+    generate_af(af_file, files, str(tmp_path), alt_pals, atlas=True)
+    skipped = tmp_path / "FIGHTR0.AF-5-1.png"
+    assert capsys.readouterr().out == f"Skipping {skipped}\n"
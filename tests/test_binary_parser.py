@@ -0,0 +1,189 @@
+import io
+import struct
+
+import pytest
+
+from omftools.pyshadowdive.utils.parser import (
+    BinaryParser,
+    BinaryWriter,
+    BufferParser,
+    xor_stream,
+)
+
+
+def write_sample(parser: BinaryParser) -> None:
+    parser.put_int8(-5)
+    parser.put_uint8(200)
+    parser.put_int16(-1234)
+    parser.put_uint16(54321)
+    parser.put_int32(-123456789)
+    parser.put_uint32(3123456789)
+    parser.put_float(1.5)
+    parser.put_null_padded_str("hello", 12)
+    parser.put_var_str("world", size_includes_zero=True)
+
+
+def read_sample(parser: BinaryParser) -> list:
+    return [
+        parser.get_int8(),
+        parser.get_uint8(),
+        parser.get_int16(),
+        parser.get_uint16(),
+        parser.get_int32(),
+        parser.get_uint32(),
+        parser.get_float(),
+        parser.get_null_padded_str(12),
+        parser.get_var_str(size_includes_zero=True),
+        parser.get_pos(),
+    ]
+
+
+@pytest.mark.parametrize("xor_key", [None, 0, 17, 255])
+def test_buffer_parser_matches_stream_parser(xor_key):
+    buf = io.BytesIO()
+    writer = BinaryParser(buf)
+    writer.set_xor_key(xor_key)
+    write_sample(writer)
+    data = buf.getvalue()
+
+    stream = BinaryParser(io.BytesIO(data))
+    stream.set_xor_key(xor_key)
+    buffer = BufferParser(data)
+    buffer.set_xor_key(xor_key)
+
+    expected = read_sample(stream)
+    assert expected[:-1] == [
+        -5,
+        200,
+        -1234,
+        54321,
+        -123456789,
+        3123456789,
+        1.5,
+        "hello",
+        "world",
+    ]
+    assert read_sample(buffer) == expected
+    assert buffer.get_file_size() == len(data)
+
+
+def test_buffer_parser_seek():
+    parser = BufferParser(bytes(range(16)))
+    parser.set_pos(8)
+    assert parser.get_uint8() == 8
+    parser.skip(3)
+    assert parser.get_pos() == 12
+    assert parser.read(10) == bytes([12, 13, 14, 15])
+
+
+@pytest.mark.parametrize("xor_key", [None, 9])
+def test_buffer_parser_truncated(xor_key):
+    # Reads past the end fail the same way for every getter
+    for getter in ("get_uint8", "get_int8", "get_uint16", "get_uint32"):
+        parser = BufferParser(b"")
+        parser.set_xor_key(xor_key)
+        with pytest.raises(struct.error):
+            getattr(parser, getter)()
+    assert BufferParser(b"").handle is None
+
+
+@pytest.mark.parametrize("xor_key", [None, 9])
+def test_get_struct(xor_key):
+    fmt = struct.Struct("<HhB")
+    buf = io.BytesIO()
+    writer = BinaryParser(buf)
+    writer.set_xor_key(xor_key)
+    writer.put_uint16(54321)
+    writer.put_int16(-2)
+    writer.put_uint8(7)
+    for parser in (
+        BinaryParser(io.BytesIO(buf.getvalue())),
+        BufferParser(buf.getvalue()),
+    ):
+        parser.set_xor_key(xor_key)
+        assert parser.get_struct(fmt) == (54321, -2, 7)
+        assert parser.get_pos() == 5
+
+
+@pytest.mark.parametrize("xor_key", [None, 3, 250])
+def test_uint8_array_matches_single_reads(xor_key):
+    data = bytes(range(256)) * 3
+    single = BufferParser(data)
+    single.set_xor_key(xor_key)
+    bulk = BufferParser(data)
+    bulk.set_xor_key(xor_key)
+
+    expected = bytes(single.get_uint8() for _ in range(len(data)))
+    assert bulk.get_uint8_array(len(data)) == expected
+    assert bulk.xor_key == single.xor_key
+
+    buf = io.BytesIO()
+    writer = BinaryParser(buf)
+    writer.set_xor_key(xor_key)
+    writer.put_uint8_array(expected)
+    assert buf.getvalue() == data
+
+
+def reference_xor(data: bytes, key: int) -> bytes:
+    out = bytearray(data)
+    for m in range(len(out)):
+        out[m] ^= key
+        key = (key + 1) & 0xFF
+    return bytes(out)
+
+
+@pytest.mark.parametrize("key", [0, 1, 127, 255])
+@pytest.mark.parametrize("length", [0, 1, 255, 256, 257, 5000])
+def test_xor_stream_matches_reference(key, length):
+    data = bytes((m * 31 + 7) & 0xFF for m in range(length))
+    assert xor_stream(data, key) == reference_xor(data, key)
+
+    parser = BufferParser(data)
+    parser.set_xor_key(key)
+    assert parser.read(length) == reference_xor(data, key)
+    assert parser.xor_key == (key + length) & 0xFF
+
+
+@pytest.mark.parametrize("xor_key", [None, 42])
+def test_writer_matches_stream_writer(xor_key):
+    buf = io.BytesIO()
+    stream = BinaryParser(buf)
+    stream.set_xor_key(xor_key)
+    write_sample(stream)
+
+    writer = BinaryWriter()
+    writer.set_xor_key(xor_key)
+    write_sample(writer)
+    assert writer.getvalue() == buf.getvalue()
+
+
+def test_writer_patches_reserved_slots():
+    buf = io.BytesIO()
+    stream = BinaryParser(buf)
+    writer = BinaryWriter()
+    for parser in (stream, writer):
+        slots = [parser.reserve_uint32() for _ in range(3)]
+        for slot in slots:
+            parser.patch_uint32(slot, parser.get_pos())
+            parser.put_bytes(b"abc")
+        assert parser.get_pos() == 21
+
+    assert writer.getvalue() == buf.getvalue()
+    reader = BufferParser(writer.getvalue())
+    assert [reader.get_uint32() for _ in range(3)] == [12, 15, 18]
+
+
+def test_binary_writer_pads_past_end():
+    writer = BinaryWriter()
+    writer.put_uint8(1)
+    writer.set_pos(4)
+    writer.put_uint8(2)
+    assert writer.getvalue() == b"\x01\x00\x00\x00\x02"
+    assert writer.get_pos() == 5
+
+    writer.skip(2)
+    assert writer.getvalue() == b"\x01\x00\x00\x00\x02\x00\x00"
+    writer.set_pos(1)
+    writer.skip(1)
+    writer.put_uint8(3)
+    assert writer.getvalue() == b"\x01\x00\x03\x00\x02\x00\x00"
@@ -0,0 +1,78 @@
+import pytest
+
+from omftools.pyshadowdive.af import AFFile
+from omftools.pyshadowdive.bk import BKFile
+from omftools.pyshadowdive.utils import cbor
+from omftools.pyshadowdive.utils.exceptions import OMFInvalidDataException
+
+from .test_formats import make_af, make_bk
+
+
+@pytest.mark.parametrize(
+    "value, encoded",
+    [
+        # Examples from RFC 8949 appendix A
+        (0, "00"),
+        (23, "17"),
+        (24, "1818"),
+        (1000, "1903e8"),
+        (1000000, "1a000f4240"),
+        (18446744073709551615, "1bffffffffffffffff"),
+        (-1, "20"),
+        (-1000, "3903e7"),
+        (1.1, "fb3ff199999999999a"),
+        (False, "f4"),
+        (True, "f5"),
+        (None, "f6"),
+        (b"\x01\x02\x03\x04", "4401020304"),
+        ("ü", "62c3bc"),
+        ([1, [2, 3], [4, 5]], "8301820203820405"),
+        ({"a": 1, "b": [2, 3]}, "a26161016162820203"),
+    ],
+)
+def test_rfc_examples(value, encoded):
+    assert cbor.dumps(value).hex() == encoded
+    assert cbor.loads(bytes.fromhex(encoded)) == value
+
+
+def test_other_encodings():
+    assert cbor.dumps({1: (1, 2)}) == cbor.dumps({"1": [1, 2]})
+    assert cbor.dumps(memoryview(b"ab")) == cbor.dumps(b"ab")
+    assert cbor.loads(bytes.fromhex("f93c00")) == 1.0
+    assert cbor.loads(bytes.fromhex("fa47c35000")) == 100000.0
+
+
+@pytest.mark.parametrize("data", ["1a000f42", "8301", "00 00", "9f", "c074", "f0"])
+def test_bad_data(data):
+    with pytest.raises(OMFInvalidDataException):
+        cbor.loads(bytes.fromhex(data))
+
+
+@pytest.mark.parametrize("data", [b"\xa1\x80\x00", b"\xa1\xa0\x00", b"\xa1\x40\x00"])
+def test_bad_map_key(data):
+    with pytest.raises(OMFInvalidDataException):
+        cbor.loads(data)
+    with pytest.raises(OMFInvalidDataException):
+        AFFile.from_packed(data)
+
+
+def test_deep_nesting():
+    assert cbor.loads(b"\x81" * cbor.MAX_DEPTH + b"\x00") is not None
+    for data in (b"\x81" * (cbor.MAX_DEPTH + 1) + b"\x00", b"\x81" * 100000):
+        with pytest.raises(OMFInvalidDataException):
+            cbor.loads(data)
+        with pytest.raises(OMFInvalidDataException):
+            AFFile.from_packed(data)
+    with pytest.raises(OMFInvalidDataException):
+        cbor.loads(b"\xa1\x61\x61" * 100000)
+
+
+@pytest.mark.parametrize("make, cls", [(make_af, AFFile), (make_bk, BKFile)])
+def test_packed_round_trip(tmp_path, make, cls):
+    obj = make()
+    for name in ("file.cbor", "file.json"):
+        filename = str(tmp_path / name)
+        obj.save_document(filename, indent=4)
+        assert cls.load_document(filename).to_native() == obj.to_native()
+    assert (tmp_path / "file.cbor").read_bytes() == obj.to_packed()
+    assert len(obj.to_packed()) < len(obj.to_json(compact=True))
@@ -0,0 +1,619 @@
+import base64
+import io
+import json
+import os
+import runpy
+import struct
+import sys
+
+import pytest
+import validx.exc
+
+from omftools.pyshadowdive import af as af_module
+from omftools.pyshadowdive.af import AFFile, _load_af_index
+from omftools.pyshadowdive.afmove import AFMove
+from omftools.pyshadowdive.bk import BKFile
+from omftools.pyshadowdive.bkanim import BKAnimation
+from omftools.pyshadowdive.language import LanguageFile
+from omftools.pyshadowdive.palette_mapping import PaletteMapping
+from omftools.pyshadowdive.pic import PicFile, Photo
+from omftools.pyshadowdive.pilot import Pilot
+from omftools.pyshadowdive.sounds import SoundFile
+from omftools.pyshadowdive.sprite import Sprite
+from omftools.pyshadowdive.tournament import TournamentFile
+from omftools.pyshadowdive.utils.exceptions import OMFInvalidDataException
+from omftools.pyshadowdive.utils.parser import BinaryWriter
+from omftools.pyshadowdive.utils.validator import UInt8Array
+from omftools.pyshadowdive.utils import json_backends
+
+# 3x2 sprite: row 0 has pixels 1, 2 at x=1, row 1 has pixel 3 at x=0
+SPRITE_IMAGE = bytes([2, 0, 4, 0, 9, 0, 1, 2, 6, 0, 5, 0, 3, 3, 0])
+
+
+def make_sprite(index: int) -> Sprite:
+    sprite = Sprite()
+    sprite.pos_x = -index
+    sprite.pos_y = index
+    sprite.width = 3
+    sprite.height = 2
+    sprite.index = index
+    sprite.image = SPRITE_IMAGE
+    return sprite
+
+
+def make_af() -> AFFile:
+    af = AFFile()
+    af.sound_table = list(range(30))
+    for move_no in (1, 5, 60):
+        move = AFMove()
+        move.base_string = f"A{move_no}-B2"
+        move.extra_strings = ["C3"]
+        move.move_string = "F1"
+        move.enemy_string = "D4"
+        move.hit_coords = [{"x": -3, "null": 0, "y": 7, "frame_id": 1}]
+        move.sprites = [make_sprite(move_no + m) for m in range(3)]
+        af.moves[move_no] = move
+    return af
+
+
+def make_bk() -> BKFile:
+    bk = BKFile()
+    bk.background_width = 4
+    bk.background_height = 3
+    bk.background_image = bytes(range(12))
+    bk.sound_table = list(range(30))
+    for anim_no in (0, 3, 49):
+        anim = BKAnimation()
+        anim.footer_string = "x"
+        anim.base_string = f"A{anim_no}"
+        anim.sprites = [make_sprite(anim_no + m) for m in range(2)]
+        bk.animations[anim_no] = anim
+    mapping = PaletteMapping()
+    mapping.colors.data = [(255, 0, 255) for _ in range(256)]
+    mapping.remaps = [bytes(range(256)) for _ in range(19)]
+    bk.palettes = [mapping, mapping]
+    return bk
+
+
+@pytest.fixture
+def af_file(tmp_path):
+    filename = str(tmp_path / "FIGHTR0.AF")
+    make_af().save_native(filename)
+    return filename
+
+
+@pytest.fixture
+def bk_file(tmp_path):
+    filename = str(tmp_path / "ARENA0.BK")
+    make_bk().save_native(filename)
+    return filename
+
+
+@pytest.mark.parametrize("file, cls", [("af_file", AFFile), ("bk_file", BKFile)])
+def test_native_round_trip(request, file, cls):
+    filename = request.getfixturevalue(file)
+    with open(filename, "rb") as handle:
+        data = handle.read()
+
+    native = cls.load_native(filename)
+    mapped = cls.load_mmap(filename)
+    assert native.to_native() == data
+    assert mapped.to_native() == data
+    assert mapped.serialize() == native.serialize()
+
+
+def test_mmap_empty_file(tmp_path):
+    filename = tmp_path / "EMPTY.AF"
+    filename.write_bytes(b"")
+    with pytest.raises(OMFInvalidDataException, match="is empty"):
+        AFFile.load_mmap(str(filename))
+
+
+@pytest.mark.parametrize("file, cls", [("af_file", AFFile), ("bk_file", BKFile)])
+def test_mmap_close(request, file, cls):
+    filename = request.getfixturevalue(file)
+    expected = cls.load_native(filename).to_native()
+    with cls.load_mmap(filename) as obj:
+        mapped = obj._mapped
+        assert not mapped.source.closed
+    assert obj._mapped is None
+    assert mapped.source.closed
+    assert obj.to_native() == expected
+    obj.close()
+
+
+def test_mmap_close_with_views_in_use(af_file):
+    af = AFFile.load_mmap(af_file)
+    view = af.moves[1].sprites[0]._image
+    mapped = af._mapped
+    # Copying out the sprites leaves the outside reference to the view
+    with pytest.raises(OMFInvalidDataException, match="still in use"):
+        af.close()
+    del view
+    mapped.source.close()
+
+
+def test_mmap_sprites_are_deferred(af_file):
+    af = AFFile.load_mmap(af_file)
+    sprite = af.moves[5].sprites[1]
+    assert isinstance(sprite._image, memoryview)
+    assert sprite.size == len(SPRITE_IMAGE)
+    assert sprite.decode_image() == [256, 1, 2, 3, 256, 256]
+    assert isinstance(sprite._image, bytes)
+    assert af.moves[5].sprites[0].serialize()["image"] == SPRITE_IMAGE
+
+
+def test_metadata_only_parse(af_file, bk_file):
+    full_af = AFFile.load_native(af_file)
+    af = AFFile.load_native(af_file, sprites=False)
+    assert af.sound_table == full_af.sound_table
+    for move_no, move in af.moves.items():
+        assert move.base_string == full_af.moves[move_no].base_string
+        assert move.enemy_string == full_af.moves[move_no].enemy_string
+        assert [s.width for s in move.sprites] == [3, 3, 3]
+        assert all(s.size == 0 for s in move.sprites)
+
+    bk = BKFile.load_native(bk_file, sprites=False, background=False, palettes=False)
+    assert bk.background_image == b""
+    assert bk.palettes == []
+    assert bk.sound_table == list(range(30))
+    assert sorted(bk.animations) == [0, 3, 49]
+
+
+def test_partial_load_can_not_be_saved(af_file, bk_file):
+    af = AFFile.load_native(af_file, sprites=False)
+    with pytest.raises(OMFInvalidDataException, match="not loaded"):
+        af.to_native()
+    with pytest.raises(OMFInvalidDataException, match="not loaded"):
+        af.serialize()
+
+    for kwargs in ({"background": False}, {"palettes": False}):
+        bk = BKFile.load_native(bk_file, **kwargs)
+        with pytest.raises(OMFInvalidDataException, match="can not be saved"):
+            bk.to_native()
+        with pytest.raises(OMFInvalidDataException, match="can not be saved"):
+            bk.serialize()
+
+    # Replacing the skipped data makes the object complete again
+    af = AFFile.load_native(af_file, sprites=False)
+    for move in af.moves.values():
+        for sprite in move.sprites:
+            sprite.image = SPRITE_IMAGE
+    assert af.to_native() == AFFile.load_native(af_file).to_native()
+
+
+def test_bk_animation_index(bk_file):
+    bk = BKFile.load_native(bk_file)
+    index = BKFile.index(bk_file)
+    assert sorted(index) == sorted(bk.animations)
+    for anim_no, animation in bk.animations.items():
+        loaded = BKFile.load_animation(bk_file, anim_no, index)
+        assert loaded.serialize() == animation.serialize()
+    assert BKFile.load_animation(bk_file, 3).base_string == "A3"
+
+
+@pytest.mark.parametrize("offset", [9, 14, 1 << 30])
+def test_bk_animation_index_bad_offset(tmp_path, offset):
+    data = bytearray(make_bk().to_native())
+    struct.pack_into("<I", data, BKFile.HEADER_SIZE, offset)
+    filename = tmp_path / "BAD.BK"
+    filename.write_bytes(data)
+    with pytest.raises(OMFInvalidDataException, match="Invalid offset"):
+        BKFile.index(str(filename))
+
+
+def test_af_move_index(tmp_path):
+    af = make_af()
+    # Sprite with the same index as the first sprite of move 5
+    missing = make_sprite(5)
+    missing.missing = True
+    af.moves[60].sprites.append(missing)
+    filename = str(tmp_path / "FIGHTR1.AF")
+    af.save_native(filename)
+
+    full = AFFile.load_native(filename)
+    index = AFFile.index(filename)
+    assert sorted(index) == [1, 5, 60]
+    assert len(index[60][2]) == 4
+    for move_no, move in full.moves.items():
+        loaded = AFFile.load_move(filename, move_no, index)
+        assert loaded.serialize() == move.serialize()
+    assert AFFile.load_move(filename, 60).sprites[3].image == SPRITE_IMAGE
+
+
+def test_af_index_sidecar(af_file, monkeypatch):
+    index = AFFile.index(af_file, sidecar=True)
+    _load_af_index.cache_clear()
+
+    # Second lookup must come from the sidecar file, not from a new walk
+    def fail(parser):
+        raise AssertionError("index was rebuilt")
+
+    monkeypatch.setattr(AFFile, "read_index", fail)
+    assert AFFile.index(af_file, sidecar=True) == index
+    _load_af_index.cache_clear()
+
+
+def test_af_index_sidecar_reads_file_head(tmp_path, monkeypatch):
+    af = make_af()
+    for move in af.moves.values():
+        for sprite in move.sprites:
+            sprite.encode_image([1] * 4000, 80, 50)
+    filename = str(tmp_path / "FIGHTR2.AF")
+    af.save_native(filename)
+    index = AFFile.index(filename, sidecar=True)
+    _load_af_index.cache_clear()
+
+    # A valid sidecar is used after reading only the start of the file
+    bytes_read = []
+
+    class CountingFile(io.FileIO):
+        def read(self, size=-1):
+            data = super().read(size)
+            if not self.name.endswith(".idx"):
+                bytes_read.append(len(data))
+            return data
+
+    monkeypatch.setattr(af_module, "open", CountingFile, raising=False)
+    assert AFFile.index(filename, sidecar=True) == index
+    assert (
+        0 < sum(bytes_read) <= af_module.SIDECAR_HASH_SIZE < os.path.getsize(filename)
+    )
+    _load_af_index.cache_clear()
+
+
+def test_af_index_sidecar_not_writable(af_file):
+    # A directory in place of the sidecar makes both reading and writing it fail
+    os.mkdir(f"{af_file}.idx")
+    index = AFFile.index(af_file, sidecar=True)
+    assert sorted(index) == [1, 5, 60]
+    assert AFFile.load_move(af_file, 5, sidecar=True).move_string == "F1"
+    _load_af_index.cache_clear()
+
+
+def test_lazy_pic_file(tmp_path):
+    pic = PicFile()
+    for m in range(5):
+        photo = Photo()
+        photo.is_player = m % 2 == 0
+        photo.sprite = make_sprite(m)
+        pic.photos.append(photo)
+    filename = str(tmp_path / "PLAYERS.PIC")
+    pic.save_native(filename)
+
+    full = PicFile.load_native(filename)
+    lazy = PicFile.open(filename, cache_size=2)
+    assert len(lazy.photos) == 5
+    assert len(lazy.photos.cache) == 0
+    assert lazy.photos[3].serialize() == full.photos[3].serialize()
+    assert lazy.photos[-1].sprite.index == 4
+    assert lazy.photos[3] is lazy.photos[3]
+    for photo in lazy.photos:
+        pass
+    assert len(lazy.photos.cache) == 2
+    assert lazy.serialize() == full.serialize()
+    with pytest.raises(IndexError):
+        lazy.photos[5]
+
+    with PicFile.open(filename) as closed:
+        mapped = closed._mapped
+    assert mapped.source.closed
+    assert closed.serialize() == full.serialize()
+
+
+def write_trn(filename: str, enemy_count: int) -> None:
+    parser = BinaryWriter()
+    parser.put_uint16(enemy_count)
+    parser.put_uint16(7)
+    victory_text_offset = parser.reserve_uint32()
+    parser.put_null_padded_str("ARENA1.BK", 14)
+    parser.put_float(1.5)
+    for value in (1, 2, 3, 4):
+        parser.put_uint32(value)
+    parser.put_padding(TournamentFile.OFFSET_TABLE_OFFSET - parser.get_pos())
+    offsets = [parser.reserve_uint32() for _ in range(enemy_count + 1)]
+
+    for m in range(enemy_count):
+        parser.patch_uint32(offsets[m], parser.get_pos())
+        block = BinaryWriter()
+        block.put_uint32(m)
+        block.put_null_padded_str(f"Pilot {m}", 18)
+        block.put_padding(Pilot.PILOT_BLOCK_LENGTH - block.get_pos())
+        parser.set_xor_key(Pilot.PILOT_BLOCK_LENGTH & 0xFF)
+        parser.put_bytes(block.getvalue())
+        parser.set_xor_key(None)
+        for q in range(10):
+            parser.put_var_str(f"Quote {m} {q}", size_includes_zero=True)
+
+    parser.patch_uint32(offsets[enemy_count], parser.get_pos())
+    for m in range(TournamentFile.MAX_LOCALES):
+        make_sprite(m).write(parser)
+    parser.put_padding(40 * 3)
+    parser.put_var_str("PLAYERS.PIC", size_includes_zero=True)
+    for m in range(TournamentFile.MAX_LOCALES):
+        parser.put_var_str(f"Title {m}", size_includes_zero=True)
+        parser.put_var_str(f"Description {m}", size_includes_zero=True)
+
+    parser.patch_uint32(victory_text_offset, parser.get_pos())
+    for locale in range(TournamentFile.MAX_LOCALES):
+        for pilot in range(TournamentFile.END_TEXT_PILOTS):
+            for page in range(10):
+                text = f"{locale}/{pilot}/{page}" if page % 3 else ""
+                parser.put_var_str(text, size_includes_zero=True)
+
+    with open(filename, "wb") as handle:
+        parser.write_to(handle)
+
+
+def test_lazy_tournament_file(tmp_path):
+    filename = str(tmp_path / "NORTHAM.TRN")
+    write_trn(filename, 4)
+
+    full = TournamentFile.load_native(filename)
+    assert full.pilots[2].name == "Pilot 2"
+    assert full.pilots[2].quotes[9] == "Quote 2 9"
+
+    lazy = TournamentFile.open(filename)
+    assert lazy.locale_titles == full.locale_titles
+    assert lazy.pic_filename == "PLAYERS.PIC"
+    assert len(lazy.pilots) == 4
+    assert len(lazy.pilots.cache) == 0
+    assert lazy.locale_end_texts[7] == full.locale_end_texts[7]
+    assert lazy.locale_end_texts[7][10][2] == "7/10/2"
+    assert lazy.locale_logos[9].serialize() == full.locale_logos[9].serialize()
+    assert lazy.pilots[3].serialize() == full.pilots[3].serialize()
+    assert lazy.serialize() == full.serialize()
+
+    summary = TournamentFile.summary(filename)
+    assert summary["enemy_count"] == 4
+    assert summary["bk_name"] == "ARENA1.BK"
+    assert summary["tournament_id"] == 4
+
+
+def test_indexed_sound_file(tmp_path):
+    samples = [bytes([m]) * (m * 10) for m in range(6)]
+    parser = BinaryWriter()
+    parser.put_uint32(0)
+    parser.put_uint32((len(samples) + 2) * 4)
+    offsets = [parser.reserve_uint32() for _ in range(len(samples))]
+    for m, sample in enumerate(samples):
+        if m > 0:
+            parser.patch_uint32(offsets[m - 1], parser.get_pos())
+        parser.put_uint16(len(sample))
+        if sample:
+            parser.put_uint8(m + 100)
+            parser.put_bytes(sample)
+    parser.patch_uint32(offsets[-1], parser.get_pos())
+    filename = str(tmp_path / "SOUNDS.DAT")
+    with open(filename, "wb") as handle:
+        parser.write_to(handle)
+
+    full = SoundFile.load_native(filename)
+    assert [bytes(s.data) for s in full.sounds] == samples
+
+    indexed = SoundFile.open(filename)
+    assert len(indexed.sounds) == len(samples)
+    assert isinstance(indexed.sounds[4].data, memoryview)
+    assert indexed.sounds[4].data == samples[4]
+    assert indexed.sounds[4].frequency == 104
+    assert indexed.sounds[0].data == b""
+    assert indexed.serialize() == full.serialize()
+
+    mapped = indexed._mapped
+    indexed.close()
+    assert mapped.source.closed
+    assert indexed.sounds[4].data == samples[4]
+    assert isinstance(indexed.sounds[4].data, bytes)
+
+
+def test_indexed_language_file(tmp_path):
+    titles = ["A", "B", "A", "C"]
+    blocks = [f"String number {m}".encode() + b"\0" for m in range(len(titles))]
+    parser = BinaryWriter()
+    offset = len(titles) * 36 + 4
+    for title, block in zip(titles, blocks):
+        parser.put_uint32(offset)
+        parser.put_null_padded_str(title, 32)
+        offset += len(block)
+    parser.put_uint32(offset)
+    for block in blocks:
+        parser.set_xor_key(len(block) & 0xFF)
+        parser.put_bytes(block)
+        parser.set_xor_key(None)
+    filename = str(tmp_path / "ENGLISH.DAT")
+    with open(filename, "wb") as handle:
+        parser.write_to(handle)
+
+    full = LanguageFile.load_native(filename)
+    assert full.titles == titles
+    assert full.strings[3] == "String number 3"
+
+    indexed = LanguageFile.open(filename, cache_size=2)
+    assert len(indexed.strings.cache) == 0
+    assert indexed.get(1) == "String number 1"
+    assert indexed.get_by_title("A") == "String number 0"
+    assert indexed.get_by_title("C") == full.get_by_title("C")
+    assert len(indexed.strings.cache) == 2
+    assert indexed.serialize() == full.serialize()
+
+
+@pytest.mark.parametrize("make, cls", [(make_af, AFFile), (make_bk, BKFile)])
+@pytest.mark.parametrize("compact", [False, True])
+def test_json_round_trip(tmp_path, make, cls, compact):
+    obj = make()
+    filename = str(tmp_path / "file.json")
+    obj.save_json(filename, compact=compact)
+    assert cls.load_json(filename).to_native() == obj.to_native()
+
+
+def test_compact_json_blobs():
+    bk = make_bk()
+    data = json.loads(bk.to_json(compact=True))
+    assert data["background_image"] == {
+        "encoding": "base64",
+        "data": "AAECAwQFBgcICQoL",
+    }
+    sprite = data["animations"]["3"]["sprites"][0]
+    assert base64.b64decode(sprite["image"]["data"]) == SPRITE_IMAGE
+
+    # Both forms can be mixed in one document
+    data["background_image"] = list(range(12))
+    assert BKFile.from_json(json.dumps(data)).to_native() == bk.to_native()
+    assert (
+        len(bk.to_json(compact=True, backend="json"))
+        < len(bk.to_json(backend="json")) / 2
+    )
+
+
+def test_compact_json_rejects_bad_data():
+    data = json.loads(make_bk().to_json(compact=True))
+    data["background_image"]["data"] = "not base64!"
+    with pytest.raises(OMFInvalidDataException):
+        BKFile.from_json(json.dumps(data))
+    data["background_image"] = [1, 2, 300]
+    with pytest.raises(OMFInvalidDataException):
+        BKFile.from_json(json.dumps(data))
+
+
+def test_uint8_array_validator():
+    validator = UInt8Array(maxlen=4)
+    assert validator([1, 2, 255]) == b"\x01\x02\xff"
+    assert validator(b"\x01") == b"\x01"
+    with pytest.raises(validx.exc.SchemaError) as e:
+        validator([1, 300, 2])
+    assert validx.exc.format_error(e.value)[0][0] == "1"
+    for bad in ([1, 2, 3, 4, 5], "abc", [1.5]):
+        with pytest.raises(validx.exc.ValidationError):
+            validator(bad)
+    assert validator([1, 300], {"trusted": True}) == [1, 300]
+    # Lengths are checked even for trusted data
+    with pytest.raises(validx.exc.MaxLengthError):
+        validator([1, 2, 3, 4, 5], {"trusted": True})
+    with pytest.raises(validx.exc.MinLengthError):
+        UInt8Array(minlen=2)([1], {"trusted": True})
+
+    # Floats and bools are not byte values, even where bytes() or validx
+    # would take them
+    for bad in ([1.0, 2.0], [True, 2], [1, False]):
+        with pytest.raises(validx.exc.SchemaError) as e:
+            validator(bad)
+        assert "Expected type" in validx.exc.format_error(e.value)[0][1]
+
+
+def test_trusted_json():
+    bk = make_bk()
+    assert BKFile.from_json(bk.to_json(), trusted=True).to_native() == bk.to_native()
+    data = json.loads(bk.to_json())
+    data["background_image"][0] = 300
+    with pytest.raises(OMFInvalidDataException, match="background_image.0"):
+        BKFile.from_json(json.dumps(data))
+    with pytest.raises(OMFInvalidDataException):
+        BKFile.from_json(json.dumps(data), trusted=True)
+
+    for image in ([1.0, 2.0], [True, 2]):
+        data = json.loads(make_af().to_json())
+        data["moves"]["1"]["sprites"][0]["image"] = image
+        with pytest.raises(OMFInvalidDataException, match="image.0"):
+            AFFile.from_json(json.dumps(data))
+
+    data = json.loads(make_af().to_json())
+    data["moves"]["1"]["sprites"][0]["image"] = [0] * 70000
+    with pytest.raises(OMFInvalidDataException, match="image"):
+        AFFile.from_json(json.dumps(data), trusted=True)
+
+
+JSON_BACKENDS = json_backends.available_backends()
+
+
+@pytest.mark.parametrize("backend", JSON_BACKENDS)
+@pytest.mark.parametrize("compact", [False, True])
+def test_json_backends(tmp_path, backend, compact):
+    af = make_af()
+    filename = str(tmp_path / "file.json")
+    af.save_json(filename, compact=compact, backend=backend, indent=4)
+    for load_backend in JSON_BACKENDS:
+        loaded = AFFile.load_json(filename, backend=load_backend)
+        assert loaded.to_native() == af.to_native()
+    assert json.loads(af.to_json(backend=backend)) == json.loads(af.to_json())
+
+
+def test_json_backend_selection(monkeypatch):
+    monkeypatch.delenv(json_backends.BACKEND_ENV, raising=False)
+    assert json_backends.get_backend().name == "json"
+    for name in JSON_BACKENDS:
+        monkeypatch.setenv(json_backends.BACKEND_ENV, name)
+        assert json_backends.get_backend().name == name
+        assert json_backends.get_backend("json").name == "json"
+    with pytest.raises(ValueError):
+        json_backends.get_backend("nope")
+
+
+def run_cli(monkeypatch, module: str, *args: str) -> None:
+    monkeypatch.setattr(sys, "argv", [module, *args])
+    with pytest.raises(SystemExit) as e:
+        runpy.run_module(module, run_name="__main__")
+    assert e.value.code == 0
+
+
+@pytest.mark.parametrize("backend", JSON_BACKENDS)
+def test_decompile_cli_json_backend(tmp_path, monkeypatch, af_file, backend):
+    # The stdlib stays the default, so that existing decompiled trees keep
+    # their formatting; other backends are picked with --json-backend or
+    # the environment, and write with an indent they support natively.
+    monkeypatch.delenv(json_backends.BACKEND_ENV, raising=False)
+    used = []
+    selected = json_backends.get_backend(backend)
+    dumps = selected.dumps
+
+    def spy(*args, **kwargs):
+        used.append(kwargs)
+        return dumps(*args, **kwargs)
+
+    monkeypatch.setattr(selected, "dumps", spy)
+    out = tmp_path / "out.json"
+    run_cli(
+        monkeypatch,
+        "omftools.cli.af_decompile",
+        af_file,
+        str(out),
+        "--json-backend",
+        backend,
+    )
+    assert used == [{"indent": selected.indent}]
+    af = AFFile.load_native(af_file)
+    assert json.loads(out.read_bytes()) == json.loads(af.to_json())
+    if backend == "json":
+        assert out.read_text() == af.to_json(indent=4)
+
+    used.clear()
+    monkeypatch.setenv(json_backends.BACKEND_ENV, backend)
+    run_cli(monkeypatch, "omftools.cli.af_decompile", af_file, str(out))
+    assert used == [{"indent": selected.indent}]
+
+
+@pytest.mark.skipif(json_backends.orjson is None, reason="orjson is not installed")
+def test_orjson_backend_fallback():
+    af = make_af()
+    # Options that orjson can not honour are handled by the stdlib
+    assert af.to_json(backend="orjson", indent=4) == af.to_json(indent=4)
+    assert af.to_json(backend="orjson", sort_keys=True) == af.to_json(sort_keys=True)
+    backend = json_backends.get_backend("orjson")
+    assert isinstance(backend.dumps({}, str, indent=2), bytes)
+    assert isinstance(backend.dumps({}, str, indent=4), str)
+
+
+@pytest.mark.parametrize(
+    "blob",
+    [
+        {"encoding": "base64", "x": 1},
+        {"encoding": "base64", "data": 5},
+        {"encoding": "base64", "data": "AAAA", "x": 1},
+        {"encoding": "base64"},
+    ],
+)
+@pytest.mark.parametrize("backend", JSON_BACKENDS)
+def test_compact_json_rejects_malformed_blobs(blob, backend):
+    data = json.loads(make_bk().to_json(compact=True))
+    data["background_image"] = blob
+    with pytest.raises(OMFInvalidDataException, match="Invalid base64 data"):
+        BKFile.from_json(json.dumps(data), backend=backend)
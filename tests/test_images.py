@@ -0,0 +1,97 @@
+import io
+
+from PIL import Image
+
+from omftools.pyshadowdive.palette import Palette
+from omftools.pyshadowdive.sprite import Sprite
+
+from .test_rle import random_raw
+
+
+def make_palette() -> Palette:
+    palette = Palette()
+    palette.data = [(m, 255 - m, (m * 7) % 256) for m in range(256)]
+    return palette
+
+
+def load_png(sprite: Sprite, palette: Palette) -> Image.Image:
+    out = io.BytesIO()
+    sprite.render(palette).save(out, "png")
+    out.seek(0)
+    return Image.open(out).convert("RGBA")
+
+
+def expected_rgba(raw: list[int], palette: Palette) -> list[tuple]:
+    return [
+        (
+            (0, 0, 0, 0)
+            if index == Sprite.TRANSPARENCY_INDEX
+            else (*palette.data[index], 255)
+        )
+        for index in raw
+    ]
+
+
+def visible(img: Image.Image) -> list[tuple]:
+    # Color of fully transparent pixels does not matter
+    data = img.tobytes()
+    pixels = [tuple(data[m : m + 4]) for m in range(0, len(data), 4)]
+    return [p if p[3] else (0, 0, 0, 0) for p in pixels]
+
+
+def test_render_matches_decoded_image():
+    palette = make_palette()
+    for seed in range(5):
+        raw, width, height = random_raw(seed)
+        sprite = Sprite().encode_image(raw, width, height)
+        img = load_png(sprite, palette)
+        assert img.size == (width, height)
+        assert visible(img) == expected_rgba(raw, palette)
+
+
+def test_render_uses_unused_transparent_index():
+    t = Sprite.TRANSPARENCY_INDEX
+    raw = [255, t, 254, t]
+    sprite = Sprite().encode_image(raw, 2, 2)
+    img = sprite.render(make_palette())
+    assert img.mode == "P"
+    assert img.info["transparency"] == 253
+    assert list(img.tobytes()) == [255, 253, 254, 253]
+
+
+def test_render_all_indexes_used():
+    raw = list(range(256)) + [Sprite.TRANSPARENCY_INDEX]
+    palette = make_palette()
+    sprite = Sprite().encode_image(raw, 257, 1)
+    img = load_png(sprite, palette)
+    assert visible(img) == expected_rgba(raw, palette)
+
+
+def test_palette_blob_follows_changes():
+    palette = make_palette()
+    assert palette.as_bytes()[3:6] == bytes(palette.data[1])
+    palette.data[1] = (1, 2, 3)
+    assert palette.as_bytes()[3:6] == b"\x01\x02\x03"
+    palette.data = [(9, 9, 9)] * 256
+    assert palette.as_bytes() == b"\x09" * 768
+
+
+def test_png_variants(tmp_path):
+    palettes = [make_palette()]
+    for m in range(1, 4):
+        palette = Palette()
+        palette.data = [((v * m) % 256, v, 255 - v) for v in range(256)]
+        palettes.append(palette)
+    raws = [random_raw(seed) for seed in range(3)]
+    raws.append((list(range(256)) + [Sprite.TRANSPARENCY_INDEX], 257, 1))
+
+    for n, (raw, width, height) in enumerate(raws):
+        sprite = Sprite().encode_image(raw, width, height)
+        variants = {str(tmp_path / f"{n}-{m}.png"): p for m, p in enumerate(palettes)}
+        sprite.save_png_variants(variants)
+        for filename, palette in variants.items():
+            with Image.open(filename) as img:
+                img.verify()
+            with Image.open(filename) as img:
+                assert img.size == (width, height)
+                assert visible(img.convert("RGBA")) == expected_rgba(raw, palette)
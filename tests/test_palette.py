@@ -0,0 +1,55 @@
+import io
+import random
+
+import pytest
+
+from omftools.pyshadowdive.palette import Palette
+from omftools.pyshadowdive.utils.parser import BinaryParser, BufferParser, BinaryWriter
+
+
+def reference_read(raw: bytes) -> list[tuple]:
+    values = [int((v * 255.0) / 63.0) for v in raw]
+    return [tuple(values[m : m + 3]) for m in range(0, len(values), 3)]
+
+
+def reference_write(colors: list[tuple]) -> bytes:
+    return bytes(int((v * 63.0) / 255.0) for c in colors for v in c)
+
+
+@pytest.mark.parametrize("limit", [64, 256])
+def test_read_matches_reference(limit):
+    rng = random.Random(limit)
+    raw = bytes(rng.randrange(0, limit) for _ in range(768))
+    assert Palette().read(BufferParser(raw)).data == reference_read(raw)
+    stream = BinaryParser(io.BytesIO(raw))
+    assert Palette().read(stream).data == reference_read(raw)
+
+
+def test_read_range():
+    raw = bytes(range(64)) * 3
+    palette = Palette().read_range(BufferParser(raw), 10, 64)
+    assert palette.data[:10] == [(0, 0, 0)] * 10
+    assert palette.data[10:74] == reference_read(raw)
+    assert len(palette.data) == 256
+
+
+@pytest.mark.parametrize("limit", [64, 256])
+def test_write_matches_reference(limit):
+    rng = random.Random(limit)
+    raw = bytes(rng.randrange(0, limit) for _ in range(768))
+    palette = Palette().read(BufferParser(raw))
+    writer = BinaryWriter()
+    palette.write(writer)
+    assert writer.getvalue() == reference_write(palette.data)
+
+    writer = BinaryWriter()
+    palette.write_range(writer, 5, 40)
+    assert writer.getvalue() == reference_write(palette.data[5:45])
+
+
+def test_all_8bit_values():
+    palette = Palette()
+    palette.data = [(c, c, c) for c in range(256)]
+    writer = BinaryWriter()
+    palette.write(writer)
+    assert writer.getvalue() == reference_write(palette.data)
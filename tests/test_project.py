@@ -0,0 +1,126 @@
+import json
+import os
+
+import pytest
+from PIL import Image
+
+from omftools.pyshadowdive.af import AFFile
+from omftools.pyshadowdive.bk import BKFile
+from omftools.pyshadowdive.project import save_project, load_project
+from omftools.pyshadowdive.utils.exceptions import OMFInvalidDataException
+
+from .test_formats import make_af, make_bk
+
+
+def encode_sprites(obj, group):
+    # Re-encode the hand written sprite data with the encoder, so that PNG
+    # round trips give back the same bytes
+    for item in group.values():
+        for sprite in item.sprites:
+            sprite.encode_image(sprite.decode_image(), sprite.width, sprite.height)
+    return obj
+
+
+@pytest.mark.parametrize("sprite_format", ["png", "raw"])
+def test_af_project_roundtrip(tmp_path, sprite_format):
+    af = make_af()
+    encode_sprites(af, af.moves)
+    save_project(af, str(tmp_path), sprite_format)
+    loaded = load_project(AFFile, str(tmp_path))
+    assert loaded.to_native() == af.to_native()
+
+
+@pytest.mark.parametrize("sprite_format", ["png", "raw"])
+def test_bk_project_roundtrip(tmp_path, sprite_format):
+    bk = make_bk()
+    encode_sprites(bk, bk.animations)
+    save_project(bk, str(tmp_path), sprite_format)
+    loaded = load_project(BKFile, str(tmp_path))
+    assert loaded.to_native() == bk.to_native()
+
+
+def test_raw_project_keeps_image_bytes(tmp_path):
+    af = make_af()
+    save_project(af, str(tmp_path), "raw")
+    assert load_project(AFFile, str(tmp_path)).to_native() == af.to_native()
+
+
+def test_png_project_keeps_unconvertible_sprites(tmp_path):
+    af = make_af()
+    # Image data on a zero sized frame, and data that does not decode
+    af.moves[1].sprites[0].width = 0
+    af.moves[5].sprites[1].image = bytes([29, 0] + [9] * 7 + [3, 0])
+    save_project(af, str(tmp_path), "png")
+    assert (tmp_path / "sprites" / "1-0.bin").exists()
+    assert (tmp_path / "sprites" / "5-1.bin").exists()
+    assert (tmp_path / "sprites" / "5-0.png").exists()
+    loaded = load_project(AFFile, str(tmp_path))
+    assert loaded.moves[1].sprites[0].image == af.moves[1].sprites[0].image
+    assert loaded.moves[5].sprites[1].image == af.moves[5].sprites[1].image
+
+
+def test_png_project_keeps_pixels(tmp_path):
+    # The hand written RLE data is not what the encoder produces, so a PNG
+    # round trip changes the image bytes but not the pixels
+    af = make_af()
+    save_project(af, str(tmp_path), "png")
+    loaded = load_project(AFFile, str(tmp_path))
+    for move_no, move in af.moves.items():
+        for sprite, other in zip(move.sprites, loaded.moves[move_no].sprites):
+            assert other.decode_image() == sprite.decode_image()
+    assert loaded.to_native() != af.to_native()
+
+
+def test_project_layout(tmp_path):
+    save_project(make_bk(), str(tmp_path))
+    with open(tmp_path / "header.json") as fd:
+        header = json.load(fd)
+    assert header["animations"] == {
+        "0": "animations/0.json",
+        "3": "animations/3.json",
+        "49": "animations/49.json",
+    }
+    assert header["background_image"] == {
+        "encoding": "png",
+        "path": "background.png",
+    }
+    with open(tmp_path / "animations" / "3.json") as fd:
+        anim = json.load(fd)
+    ref = anim["sprites"][0]["image"]
+    assert ref["encoding"] == "png"
+    with Image.open(tmp_path / ref["path"]) as img:
+        assert img.mode == "P"
+        assert img.size == (3, 2)
+        assert img.info["transparency"] == 255
+    with Image.open(tmp_path / "background.png") as img:
+        assert img.tobytes() == bytes(range(12))
+
+
+def test_project_edit_single_file(tmp_path):
+    save_project(make_af(), str(tmp_path))
+    path = tmp_path / "moves" / "5.json"
+    with open(path) as fd:
+        move = json.load(fd)
+    move["move_string"] = "F2"
+    with open(path, "w") as fd:
+        json.dump(move, fd)
+    loaded = load_project(AFFile, str(tmp_path))
+    assert loaded.moves[5].move_string == "F2"
+    assert loaded.moves[1].move_string == "F1"
+
+
+def test_project_rejects_bad_sprites(tmp_path):
+    save_project(make_af(), str(tmp_path))
+    sprite = tmp_path / "sprites" / "1-0.png"
+    Image.new("P", (4, 4)).save(sprite)
+    with pytest.raises(OMFInvalidDataException, match="expected 3x2"):
+        load_project(AFFile, str(tmp_path))
+
+    path = tmp_path / "moves" / "1.json"
+    with open(path) as fd:
+        move = json.load(fd)
+    move["sprites"][0]["image"]["path"] = os.path.join("..", "outside.png")
+    with open(path, "w") as fd:
+        json.dump(move, fd)
+    with pytest.raises(OMFInvalidDataException, match="Invalid project path"):
+        load_project(AFFile, str(tmp_path))
@@ -0,0 +1,200 @@
+import random
+
+import pytest
+
+from omftools.pyshadowdive import sprite as sprite_module
+from omftools.pyshadowdive.sprite import Sprite
+from omftools.pyshadowdive.utils import rle
+from omftools.pyshadowdive.utils.exceptions import OMFInvalidDataException
+
+
+def reference_decode(image: bytes, width: int, height: int) -> list[int]:
+    # The original pixel-at-a-time decoder
+    in_size = len(image)
+    out = [Sprite.TRANSPARENCY_INDEX for _ in range(width * height)]
+    x = y = i = 0
+    while i < in_size:
+        c = image[i] + (image[i + 1] << 8)
+        data, op = divmod(c, 4)
+        i += 2
+        if op == 0:
+            x = data
+        elif op == 2:
+            y = data
+        elif op == 1:
+            while data > 0:
+                out[(y * width) + x] = image[i]
+                i += 1
+                x += 1
+                data -= 1
+            x = 0
+        elif op == 3:
+            if i != in_size:
+                raise OMFInvalidDataException("Bad image data!")
+    return out
+
+
+def random_sprite(seed: int) -> Sprite:
+    rng = random.Random(seed)
+    width = rng.randrange(1, 80)
+    height = rng.randrange(1, 80)
+    out = bytearray()
+
+    def op(data: int, code: int) -> None:
+        out.extend((data * 4 + code).to_bytes(2, "little"))
+
+    for y in range(height):
+        if rng.random() < 0.2:
+            continue
+        op(y, 2)
+        x = 0
+        while x < width - 1 and rng.random() < 0.7:
+            x = rng.randrange(x, width)
+            length = rng.randrange(1, width - x + 1)
+            op(x, 0)
+            op(length, 1)
+            out.extend(rng.randrange(0, 256) for _ in range(length))
+            x += length
+    op(0, 3)
+
+    sprite = Sprite()
+    sprite.width = width
+    sprite.height = height
+    sprite.image = bytes(out)
+    return sprite
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_decode_matches_reference(seed):
+    sprite = random_sprite(seed)
+    expected = reference_decode(sprite.image, sprite.width, sprite.height)
+    assert sprite.decode_image() == expected
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_decode_array_matches_reference(seed):
+    pytest.importorskip("numpy")
+    sprite = random_sprite(seed)
+    expected = reference_decode(sprite.image, sprite.width, sprite.height)
+    assert sprite.decode_array().tolist() == expected
+
+
+def test_decode_array_without_numpy(monkeypatch):
+    monkeypatch.setattr(rle, "numpy", None)
+    sprite = random_sprite(1)
+    assert sprite.decode_array() == sprite.decode_image()
+
+
+def test_decode_rejects_bad_data():
+    sprite = random_sprite(2)
+    sprite.image = sprite.image + b"\x03\x00"
+    with pytest.raises(OMFInvalidDataException):
+        sprite.decode_image()
+
+
+def random_raw(seed: int) -> tuple[list[int], int, int]:
+    rng = random.Random(seed)
+    width = rng.randrange(1, 80)
+    height = rng.randrange(1, 80)
+    raw = [
+        Sprite.TRANSPARENCY_INDEX if rng.random() < 0.4 else rng.randrange(0, 256)
+        for _ in range(width * height)
+    ]
+    return raw, width, height
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_encode_round_trip(seed):
+    raw, width, height = random_raw(seed)
+    sprite = Sprite().encode_image(raw, width, height)
+    assert (sprite.width, sprite.height) == (width, height)
+    assert reference_decode(sprite.image, width, height) == raw
+    assert sprite.decode_image() == raw
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_encode_without_numpy(monkeypatch, seed):
+    raw, width, height = random_raw(seed)
+    expected = Sprite().encode_image(raw, width, height).image
+    monkeypatch.setattr(rle, "numpy", None)
+    assert Sprite().encode_image(raw, width, height).image == expected
+
+
+def test_encode_reencodes_decoded_sprite():
+    sprite = random_sprite(3)
+    raw = sprite.decode_image()
+    encoded = Sprite().encode_image(raw, sprite.width, sprite.height)
+    assert encoded.decode_image() == raw
+
+
+def test_encode_opcodes():
+    t = Sprite.TRANSPARENCY_INDEX
+    raw = [t, 5, 6, t, 7, t, t, t, t]
+    sprite = Sprite().encode_image(raw, 3, 3)
+    assert sprite.image == bytes([2, 0, 4, 0, 9, 0, 5, 6, 6, 0, 4, 0, 5, 0, 7, 3, 0])
+
+
+def test_encode_custom_transparent_index():
+    raw = [0, 0, 1, 2, 0, 3]
+    sprite = Sprite().encode_image(raw, 3, 2, transparent=0)
+    assert reference_decode(sprite.image, 3, 2) == [
+        Sprite.TRANSPARENCY_INDEX if v == 0 else v for v in raw
+    ]
+
+
+def test_encode_widest_row():
+    sprite = Sprite().encode_image([1] * 16383, 16383, 1)
+    assert sprite.decode_image() == [1] * 16383
+    with pytest.raises(OMFInvalidDataException):
+        Sprite().encode_image([1] * 16384, 16384, 1)
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_encode_rejects_bad_input(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(rle, "numpy", None)
+    with pytest.raises(OMFInvalidDataException):
+        Sprite().encode_image([1, 2, 3], 2, 2)
+    with pytest.raises(OMFInvalidDataException):
+        Sprite().encode_image([1, 300], 2, 1)
+
+
+def reference_scan(sprite: Sprite) -> tuple[int, int, list[int]]:
+    indexes = {
+        index
+        for index in reference_decode(sprite.image, sprite.width, sprite.height)
+        if index != Sprite.TRANSPARENCY_INDEX
+    }
+    if not indexes:
+        return 255, 0, []
+    return min(indexes), max(indexes), sorted(indexes)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_scan_image_matches_reference(seed):
+    sprite = random_sprite(seed)
+    assert sprite.scan_image() == reference_scan(sprite)
+
+
+def test_scan_image_cache(monkeypatch):
+    cache = sprite_module.LRUCache(2)
+    monkeypatch.setattr(sprite_module, "_scan_cache", cache)
+    sprite = random_sprite(4)
+    copy = Sprite()
+    copy.width, copy.height = sprite.width, sprite.height
+    copy.link_image(sprite)
+    assert copy.scan_image() == sprite.scan_image()
+    assert len(cache) == 1
+
+    # Edits to the image are not hidden by the cache
+    sprite.encode_image([7, 9], 2, 1)
+    assert (sprite.pal_start_index, sprite.pal_end_index) == (7, 9)
+    assert sprite.pal_indexes == [7, 9]
+
+    for seed in range(5, 10):
+        random_sprite(seed).scan_image()
+    assert len(cache) == 2
+
+
+def test_scan_image_empty():
+    assert Sprite().scan_image() == (255, 0, [])